@@ -0,0 +1,312 @@
+# Benchmarks for the parameter package
+# Author : Matthew Davidson
+# Matthew Davidson © 2022
+
+"""
+Benchmarks of the conversion, arithmetic, loading and grouping hot paths.
+
+Parameters are generated synthetically, so the suite runs offline and
+reproducibly. Results are written as JSON, and can be compared against a
+saved baseline to flag regressions.
+
+    python benchmarks/run_benchmarks.py --output baseline.json
+    python benchmarks/run_benchmarks.py --compare baseline.json
+"""
+
+from __future__ import annotations
+import argparse
+import json
+import platform
+import sys
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+
+import numpy as np
+import yaml
+
+import parameter
+from parameter.arrays import to_si_batch
+from parameter.dtypes import dtype_policy
+from parameter.storage import load_parameters, save_parameters
+from parameter.parameter import (
+    Parameter,
+    Parameters,
+    dict_to_parameters,
+    read_parameters_from_yaml,
+)
+
+UNITS = ["mm", "m", "kg/m^3", "N.mm", "deg/min", "MPa", "lbf", "-"]
+DEFAULT_SIZES = [100, 1000, 10000]
+KINDS = ["scalar", "ndarray"]
+ARRAY_SIZE = 16
+# Length of the arrays of the dtype benchmarks
+DEFAULT_ARRAY_LENGTH = 10**7
+DTYPES = ["float64", "float32"]
+SEED = 0
+
+BENCHMARKS = {}
+
+
+def benchmark(name):
+    """
+    Register a benchmark.
+
+    The decorated function takes the number of parameters and the kind of values,
+    does any setup, and returns the function to be timed.
+    """
+
+    def decorator(func):
+        BENCHMARKS[name] = func
+        return func
+
+    return decorator
+
+
+def make_values(size: int, kind: str, rng) -> list:
+    if kind == "scalar":
+        return rng.random(size).tolist()
+    return list(rng.random((size, ARRAY_SIZE)))
+
+
+def make_nested_dict(size: int, kind: str) -> dict:
+    """Make a nested parameter dictionary, with groups of up to 10 parameters"""
+    rng = np.random.default_rng(SEED)
+    values = make_values(size, kind, rng)
+    nested = {}
+    for i, value in enumerate(values):
+        group = nested.setdefault(f"group_{i // 10:07d}", {})
+        group[f"p{i % 10}"] = [value, UNITS[(i // 10) % len(UNITS)]]
+    return nested
+
+
+def make_parameters(size: int, kind: str) -> Parameters:
+    return dict_to_parameters(make_nested_dict(size, kind))
+
+
+@benchmark("Parameter.si_units")
+def bench_si_units(size, kind):
+    params = list(make_parameters(size, kind).values())
+    return lambda: [p.si_units for p in params]
+
+
+@benchmark("Parameter._apply_operator same units")
+def bench_operator_same_units(size, kind):
+    params = list(make_parameters(size, kind).values())
+    return lambda: [p + p for p in params]
+
+
+@benchmark("Parameter._apply_operator converted units")
+def bench_operator_converted_units(size, kind):
+    params = list(make_parameters(size, kind).values())
+    others = [Parameter(p.value, p.si_units.units) for p in params]
+    return lambda: [p + o for p, o in zip(params, others)]
+
+
+@benchmark("dict_to_parameters")
+def bench_dict_to_parameters(size, kind):
+    nested = make_nested_dict(size, kind)
+    return lambda: dict_to_parameters(nested)
+
+
+@benchmark("read_parameters_from_yaml")
+def bench_read_parameters_from_yaml(size, kind):
+    nested = make_nested_dict(size, kind)
+    if kind == "ndarray":
+        nested = {
+            group: {key: [value.tolist(), units] for key, (value, units) in values.items()}
+            for group, values in nested.items()
+        }
+    directory = tempfile.TemporaryDirectory()
+    path = Path(directory.name) / "parameters.yaml"
+    with open(path, "w") as file:
+        yaml.safe_dump(nested, file)
+
+    def read():
+        # Keeps the temporary directory alive until the benchmark is finished
+        return read_parameters_from_yaml(path), directory
+
+    return read
+
+
+@benchmark("load_parameters binary")
+def bench_load_parameters_binary(size, kind):
+    directory = tempfile.TemporaryDirectory()
+    path = Path(directory.name) / "parameters.params"
+    save_parameters(make_parameters(size, kind), path)
+
+    def load():
+        # Keeps the temporary directory alive until the benchmark is finished
+        return load_parameters(path), directory
+
+    return load
+
+
+@benchmark("to_si_batch")
+def bench_to_si_batch(size, kind):
+    rng = np.random.default_rng(SEED)
+    values = np.asarray(make_values(size, kind, rng))
+    units = [UNITS[i % len(UNITS)] for i in range(size)]
+    return lambda: to_si_batch(values, units)
+
+
+@benchmark("Parameters.group_by_prefix")
+def bench_group_by_prefix(size, kind):
+    params = make_parameters(size, kind)
+    return params.group_by_prefix
+
+
+@benchmark("Parameters.values_only")
+def bench_values_only(size, kind):
+    params = make_parameters(size, kind)
+    return lambda: params.values_only
+
+
+@benchmark("Parameters.table")
+def bench_table(size, kind):
+    params = make_parameters(size, kind)
+    return params.table
+
+
+@benchmark("Parameters.table_pretty")
+def bench_table_pretty(size, kind):
+    params = make_parameters(size, kind)
+    return lambda: params.table_pretty.get_string()
+
+
+# Benchmarks of single large array Parameters, taking the two operands
+DTYPE_BENCHMARKS = {
+    "dtype si_units": lambda a, b: a.si_units,
+    "dtype add": lambda a, b: a + b,
+}
+
+
+def run_dtypes(length: int, repeats: int) -> list:
+    """
+    Time the SI conversion and arithmetic of arrays of each dtype, with their
+    throughput and peak memory use
+    """
+    results = []
+    rng = np.random.default_rng(SEED)
+    for dtype in DTYPES:
+        with dtype_policy(dtype, on_widen="cast"):
+            a = Parameter(rng.random(length).astype(dtype), "mm")
+            b = Parameter(rng.random(length).astype(dtype), "m")
+            for name, func in DTYPE_BENCHMARKS.items():
+                seconds = time_function(lambda: func(a, b), repeats)
+                tracemalloc.start()
+                func(a, b)
+                _, peak_bytes = tracemalloc.get_traced_memory()
+                tracemalloc.stop()
+                results.append(
+                    {
+                        "name": name,
+                        "kind": dtype,
+                        "size": length,
+                        "seconds": seconds,
+                        "elements_per_second": length / seconds,
+                        "peak_bytes": peak_bytes,
+                    }
+                )
+                print(
+                    f"{name:45} {dtype:8} {length:>9} {seconds:12.6f}s {peak_bytes / 2**20:9.1f}MiB",
+                    file=sys.stderr,
+                )
+    return results
+
+
+def time_function(func, repeats: int) -> float:
+    """Return the fastest of several timings of a function, in seconds"""
+    timings = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+
+def run(names, sizes, kinds, repeats) -> dict:
+    results = []
+    for name in names:
+        for kind in kinds:
+            for size in sizes:
+                func = BENCHMARKS[name](size, kind)
+                seconds = time_function(func, repeats)
+                results.append({"name": name, "kind": kind, "size": size, "seconds": seconds})
+                print(f"{name:45} {kind:8} {size:>9} {seconds:12.6f}s", file=sys.stderr)
+    return {
+        "meta": {
+            "parameter": parameter.__version__,
+            "python": platform.python_version(),
+            "numpy": np.__version__,
+            "platform": platform.platform(),
+            "repeats": repeats,
+        },
+        "results": results,
+    }
+
+
+def compare(report: dict, baseline: dict, threshold: float) -> list:
+    """Return the results that are slower than the baseline by more than the threshold"""
+    baseline_seconds = {
+        (r["name"], r["kind"], r["size"]): r["seconds"] for r in baseline["results"]
+    }
+    regressions = []
+    for result in report["results"]:
+        key = (result["name"], result["kind"], result["size"])
+        if key not in baseline_seconds:
+            continue
+        ratio = result["seconds"] / baseline_seconds[key]
+        result["baseline_seconds"] = baseline_seconds[key]
+        result["ratio"] = ratio
+        result["regression"] = ratio > 1 + threshold
+        if result["regression"]:
+            regressions.append(result)
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--sizes", type=int, nargs="+", default=DEFAULT_SIZES)
+    parser.add_argument("--kinds", nargs="+", choices=KINDS, default=KINDS)
+    parser.add_argument("--benchmarks", nargs="+", choices=list(BENCHMARKS), default=list(BENCHMARKS))
+    parser.add_argument("--repeats", type=int, default=3)
+    parser.add_argument(
+        "--array-length",
+        type=int,
+        default=DEFAULT_ARRAY_LENGTH,
+        help="length of the arrays of the dtype benchmarks, 0 to skip them",
+    )
+    parser.add_argument("--output", type=Path, help="write the JSON report to a file")
+    parser.add_argument("--compare", type=Path, help="baseline JSON report to compare against")
+    parser.add_argument(
+        "--threshold", type=float, default=0.2, help="allowed slowdown before flagging a regression"
+    )
+    args = parser.parse_args(argv)
+
+    report = run(args.benchmarks, args.sizes, args.kinds, args.repeats)
+    if args.array_length:
+        report["results"] += run_dtypes(args.array_length, args.repeats)
+    regressions = []
+    if args.compare:
+        with open(args.compare) as file:
+            regressions = compare(report, json.load(file), args.threshold)
+        report["regressions"] = len(regressions)
+        for result in regressions:
+            print(
+                f"REGRESSION {result['name']} {result['kind']} {result['size']}: "
+                f"{result['ratio']:.2f}x baseline",
+                file=sys.stderr,
+            )
+
+    output = json.dumps(report, indent=2)
+    if args.output:
+        args.output.write_text(output)
+    else:
+        print(output)
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,146 @@
+# Columnar Parameters
+# Author : Matthew Davidson
+# Matthew Davidson © 2022
+
+from __future__ import annotations
+import logging
+from numbers import Real
+import numpy as np
+from parameter.parameter import Parameter, Parameters
+from parameter.units import compile_units
+
+
+def _factorize(units) -> tuple[np.ndarray, list]:
+    """Encode a sequence of unit strings as integer codes into a list of unique units"""
+    if isinstance(units, np.ndarray):
+        # Python strings hash much faster than numpy string scalars
+        units = units.tolist()
+    unique_units = list(dict.fromkeys(units))
+    index = {u: i for i, u in enumerate(unique_units)}
+    codes = np.array(list(map(index.__getitem__, units)), dtype=np.intp)
+    return codes, unique_units
+
+
+def to_si_batch(values, units) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Convert an array of values, in a parallel sequence of unit strings, to SI
+    units, returning the SI values and an object array of their SI unit strings.
+
+    Each distinct unit string is compiled once, and the factors are applied
+    with a single vectorized multiply.
+    """
+    values = np.asarray(values)
+    if values.dtype.kind in "biu":
+        values = values.astype(np.float64)
+    if len(values) != len(units):
+        logging.error(f"Got {len(values)} values and {len(units)} units")
+        raise ValueError(f"Got {len(values)} values and {len(units)} units")
+    codes, unique_units = _factorize(units)
+    compiled = [compile_units(u) for u in unique_units]
+    factors = np.array([u.factor for u in compiled], dtype=values.dtype)
+    si_units = np.array([u.si_units for u in compiled] or [""], dtype=object)
+    # Rows of multidimensional values are scaled by the factor of their units
+    row_factors = factors[codes].reshape((-1,) + (1,) * (values.ndim - 1))
+    return values * row_factors, si_units[codes]
+
+
+class ParameterArray:
+    """
+    A set of parameters stored column-wise.
+
+    Scalar values are held in a single float64 array, with their units stored as
+    integer codes into a list of unique unit strings, so that the whole set can be
+    converted to SI units with one vectorized multiply. Parameters that do not have
+    a real scalar value (strings, lists, arrays) are kept as Parameter objects.
+    """
+
+    def __init__(
+        self,
+        names: list,
+        values: np.ndarray,
+        codes: np.ndarray,
+        units: list,
+        objects: dict | None = None,
+    ):
+        self.names = names
+        self.values = values
+        self.codes = codes
+        self.units = units
+        self.objects = {} if objects is None else objects
+        self._index = {name: i for i, name in enumerate(names)}
+
+    @classmethod
+    def from_parameters(cls, parameters) -> ParameterArray:
+        """Build a ParameterArray from a Parameters object, or any mapping of Parameter"""
+        names, values, units, objects = [], [], [], {}
+        for name, param in parameters.items():
+            names.append(name)
+            value = getattr(param, "value", None)
+            if (
+                type(value) in (float, int)
+                or isinstance(value, Real)
+                and not isinstance(value, bool)
+            ) and isinstance(param, Parameter):
+                values.append(value)
+                units.append(param.units)
+            else:
+                # NaN value and code -1 mark an entry that is held in objects
+                values.append(np.nan)
+                units.append(None)
+                objects[name] = param
+        codes, unique_units = _factorize(units)
+        if objects:
+            none_code = unique_units.index(None)
+            unique_units.pop(none_code)
+            codes[codes == none_code] = -1
+            codes[codes > none_code] -= 1
+        return cls(names, np.asarray(values, dtype=np.float64), codes, unique_units, objects)
+
+    def __len__(self):
+        return len(self.names)
+
+    def __contains__(self, name):
+        return name in self._index
+
+    def __getitem__(self, name) -> Parameter:
+        if name in self.objects:
+            return self.objects[name]
+        i = self._index[name]
+        return Parameter(float(self.values[i]), self.units[self.codes[i]])
+
+    @property
+    def si_units(self) -> ParameterArray:
+        """
+        Convert all parameters to SI units
+        """
+        compiled = [compile_units(u) for u in self.units]
+        # Code -1 marks entries held in objects, which index the trailing factor of 1
+        factors = np.array([u.factor for u in compiled] + [1.0], dtype=np.float64)
+        si_codes, si_units = _factorize([u.si_units for u in compiled])
+        si_codes = np.append(si_codes, -1)
+        return self.__class__(
+            self.names,
+            self.values * factors[self.codes],
+            si_codes[self.codes],
+            si_units,
+            {
+                name: param.si_units if isinstance(param, Parameter) else param
+                for name, param in self.objects.items()
+            },
+        )
+
+    def to_parameters(self, object_type=Parameters) -> Parameters:
+        """
+        Convert back to a Parameters object.
+
+        Scalar values are returned as floats.
+        """
+        values = self.values.tolist()
+        units = self.units
+        parameter_kvpairs = {}
+        for name, value, code in zip(self.names, values, self.codes.tolist()):
+            if code == -1:
+                parameter_kvpairs[name] = self.objects[name]
+            else:
+                parameter_kvpairs[name] = Parameter(value, units[code])
+        return object_type(**parameter_kvpairs)
@@ -0,0 +1,154 @@
+# Parse cache for yaml parameter files
+# Author : Matthew Davidson
+# Matthew Davidson © 2022
+
+"""
+Opt-in on-disk cache of parsed yaml parameter files.
+
+The flattened parameters of a file are stored with marshal, keyed by the hash
+of the file contents, the library version and a digest of the conversion
+tables, so later loads skip yaml parsing until one of them changes. Stale or
+unreadable cache files are rebuilt.
+
+    parameters = read_parameters_from_yaml("parameters.yaml", cache=True)
+"""
+
+from __future__ import annotations
+import hashlib
+import logging
+import marshal
+from pathlib import Path
+from parameter import __version__
+import parameter.conversion as convert
+from parameter.parameter import (
+    Parameter,
+    Parameters,
+    pairs_to_parameters,
+    resolve_path,
+    write_atomic,
+)
+
+# Incremented whenever the layout of the cached data changes
+FORMAT_VERSION = 1
+
+# Directory created next to the source file when no cache directory is given
+CACHE_DIRECTORY = ".parameter_cache"
+
+_tables_digest = (None, None)
+
+
+def conversion_tables_digest() -> str:
+    """Return a digest of the contents of the conversion tables"""
+    global _tables_digest
+    version, digest = _tables_digest
+    if version != convert.ConversionTable.version:
+        tables = (convert.TO_SI_FACTOR, convert.TO_SI_UNITS, convert.SI_DIMENSIONS)
+        contents = repr([sorted((str(k), repr(v)) for k, v in t.items()) for t in tables])
+        digest = hashlib.sha256(contents.encode()).hexdigest()
+        _tables_digest = (convert.ConversionTable.version, digest)
+    return digest
+
+
+def file_digest(path: Path) -> str:
+    """Return the sha256 digest of the contents of a file"""
+    digest = hashlib.sha256()
+    with open(path, "rb") as file:
+        for block in iter(lambda: file.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def cache_path(filepath: str | Path, variant: str, cache=True) -> Path:
+    """
+    Return the path of the cache file of a yaml file, in the given cache
+    directory, or in CACHE_DIRECTORY next to the yaml file if cache is True
+    """
+    path = resolve_path(filepath).resolve()
+    directory = path.parent / CACHE_DIRECTORY if cache is True else Path(cache)
+    # The hash of the source path keeps files of the same name apart in a shared directory
+    source = hashlib.sha256(str(path).encode()).hexdigest()[:16]
+    return directory / f"{path.name}.{source}.{variant}.cache"
+
+
+def cached(filepath: str | Path, variant: str, build, cache=True):
+    """
+    Return the cached data of a yaml file, or build it with build() and store
+    it if the cache is missing, stale or corrupt
+    """
+    key = (
+        FORMAT_VERSION,
+        __version__,
+        conversion_tables_digest(),
+        file_digest(resolve_path(filepath)),
+    )
+    path = cache_path(filepath, variant, cache)
+    try:
+        with open(path, "rb") as file:
+            stored_key, data = marshal.load(file)
+        if stored_key == key:
+            return data
+    except FileNotFoundError:
+        pass
+    except (EOFError, ValueError, TypeError, OSError) as error:
+        logging.warning(f"Rebuilding unreadable parameter cache {path}: {error}")
+
+    data = build()
+    try:
+        contents = marshal.dumps((key, data))
+    except ValueError as error:
+        logging.warning(f"Cannot cache parameters of {filepath}: {error}")
+        return data
+    try:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        write_atomic(path, lambda file: file.write(contents))
+    except OSError as error:
+        logging.warning(f"Cannot write parameter cache {path}: {error}")
+    return data
+
+
+def _to_columns(parameters) -> tuple[list, list, list]:
+    keys, values, units = [], [], []
+    for key, param in parameters.items():
+        keys.append(key)
+        # Values converted from lists are stored as lists, and converted again when loaded
+        values.append(param.value.tolist() if param._container is not None else param.value)
+        units.append(str(param.units))
+    return keys, values, units
+
+
+def _from_columns(columns):
+    keys, values, units = columns
+    return zip(keys, map(Parameter, values, units))
+
+
+def load_cached_parameters(
+    filepath: str | Path, cache=True, convert_to_si=False, object_type=Parameters
+) -> Parameters:
+    """
+    Load the flattened parameters of a yaml file through the cache, optionally
+    converted to SI units
+    """
+
+    def build():
+        from parameter.loader import load_parameters_from_yaml
+
+        parameters = load_parameters_from_yaml(filepath)
+        return _to_columns(parameters.si_view if convert_to_si else parameters)
+
+    columns = cached(filepath, "si" if convert_to_si else "parameters", build, cache)
+    return pairs_to_parameters(_from_columns(columns), object_type)
+
+
+def load_cached_parameter_sets(filepath: str | Path, cache=True) -> dict:
+    """Load the sets of parameters of a yaml file through the cache"""
+
+    def build():
+        from parameter.loader import iter_parameter_sets_from_yaml
+
+        return {
+            name: _to_columns(parameters)
+            for name, parameters in iter_parameter_sets_from_yaml(filepath)
+        }
+
+    sets = cached(filepath, "sets", build, cache)
+    return {name: pairs_to_parameters(_from_columns(columns)) for name, columns in sets.items()}
@@ -2,7 +2,58 @@ from math import pi
 
 DIMENSIONLESS = (1, '1', '-')
 
-TO_SI_FACTOR = {
+
+class ConversionTable(dict):
+    """
+    A conversion table that records when it is modified, so that anything
+    derived from it (such as compiled units) can be invalidated
+    """
+
+    # Shared by all tables, bumped whenever any of them is modified
+    version = 0
+
+    @classmethod
+    def _modified(cls):
+        cls.version += 1
+
+    def __setitem__(self, key, value):
+        super().__setitem__(key, value)
+        self._modified()
+
+    def __delitem__(self, key):
+        super().__delitem__(key)
+        self._modified()
+
+    def __ior__(self, other):
+        result = super().__ior__(other)
+        self._modified()
+        return result
+
+    def update(self, *args, **kwargs):
+        super().update(*args, **kwargs)
+        self._modified()
+
+    def setdefault(self, key, default=None):
+        result = super().setdefault(key, default)
+        self._modified()
+        return result
+
+    def pop(self, *args):
+        result = super().pop(*args)
+        self._modified()
+        return result
+
+    def popitem(self):
+        result = super().popitem()
+        self._modified()
+        return result
+
+    def clear(self):
+        super().clear()
+        self._modified()
+
+
+TO_SI_FACTOR = ConversionTable({
     '1': 1,
     1: 1,
     'km': 1e3,
@@ -50,9 +101,9 @@ TO_SI_FACTOR = {
     'kton': 907184.74,
     'long_ton': 1016.0469088,
     'short_ton': 907.18474,
-}
+})
 
-TO_SI_UNITS = {
+TO_SI_UNITS = ConversionTable({
     '1': '1',
     1: 1,
     'km': 'm',
@@ -100,4 +151,23 @@ TO_SI_UNITS = {
     'kton': 'kg',
     'long_ton': 'kg',
     'short_ton': 'kg',
-}
+})
+
+# Base dimensions that unit exponent vectors are expressed over
+BASE_DIMENSIONS = ('m', 'kg', 's', 'A', 'K', 'mol', 'cd', 'rad')
+
+# Exponents of the base dimensions for each SI unit symbol used in TO_SI_UNITS
+SI_DIMENSIONS = ConversionTable({
+    '1': (0, 0, 0, 0, 0, 0, 0, 0),
+    '-': (0, 0, 0, 0, 0, 0, 0, 0),
+    'm': (1, 0, 0, 0, 0, 0, 0, 0),
+    'kg': (0, 1, 0, 0, 0, 0, 0, 0),
+    's': (0, 0, 1, 0, 0, 0, 0, 0),
+    'A': (0, 0, 0, 1, 0, 0, 0, 0),
+    'K': (0, 0, 0, 0, 1, 0, 0, 0),
+    'mol': (0, 0, 0, 0, 0, 1, 0, 0),
+    'cd': (0, 0, 0, 0, 0, 0, 1, 0),
+    'rad': (0, 0, 0, 0, 0, 0, 0, 1),
+    'N': (1, 1, -2, 0, 0, 0, 0, 0),
+    'Pa': (-1, 1, -2, 0, 0, 0, 0, 0),
+})
@@ -0,0 +1,92 @@
+# dtype policy for array values
+# Author : Matthew Davidson
+# Matthew Davidson © 2022
+
+"""
+The dtype policy used for array values of Parameters.
+
+The policy sets the dtype of arrays created from lists and of integer arrays
+converted to SI units, and what happens when an operation gives a floating
+dtype wider than the policy dtype, or than its narrowest floating operand.
+
+    with dtype_policy("float32", on_widen="cast"):
+        parameters = read_parameters_from_yaml("parameters.yaml").si_units
+"""
+
+from __future__ import annotations
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass
+import logging
+import sys
+
+# What to do when an operation widens the dtype of an array
+ON_WIDEN = ("allow", "cast", "raise")
+
+
+@dataclass(frozen=True)
+class DtypePolicy:
+    """
+    dtype: dtype of arrays created from lists and of converted integer arrays,
+    None to let numpy choose.
+    on_widen: "allow" a wider result, "cast" it back to the narrower dtype, or
+    "raise" a ValueError.
+    """
+
+    dtype: object = None
+    on_widen: str = "allow"
+
+    def __post_init__(self):
+        if self.on_widen not in ON_WIDEN:
+            logging.error(f"on_widen must be one of {ON_WIDEN}, not {self.on_widen}")
+            raise ValueError(f"on_widen must be one of {ON_WIDEN}, not {self.on_widen}")
+
+
+_global_policy = DtypePolicy()
+_context_policy = ContextVar("dtype_policy", default=None)
+
+
+def get_dtype_policy() -> DtypePolicy:
+    """Return the dtype policy in effect"""
+    policy = _context_policy.get()
+    return _global_policy if policy is None else policy
+
+
+def set_dtype_policy(dtype=None, on_widen: str = "allow") -> DtypePolicy:
+    """Set the global dtype policy, returning the previous one"""
+    global _global_policy
+    previous, _global_policy = _global_policy, DtypePolicy(dtype, on_widen)
+    return previous
+
+
+@contextmanager
+def dtype_policy(dtype=None, on_widen: str = "allow"):
+    """Use a dtype policy within a block of code, in the current thread or task only"""
+    token = _context_policy.set(DtypePolicy(dtype, on_widen))
+    try:
+        yield get_dtype_policy()
+    finally:
+        _context_policy.reset(token)
+
+
+def apply_dtype_policy(result, *operands):
+    """Apply the dtype policy to the ndarray result of an operation on the operands"""
+    policy = get_dtype_policy()
+    if policy.on_widen == "allow" or result.dtype.kind not in "fc":
+        return result
+    np = sys.modules["numpy"]
+    if policy.dtype is not None:
+        target = np.dtype(policy.dtype)
+    else:
+        inexact = [
+            x.dtype for x in operands if isinstance(x, np.ndarray) and x.dtype.kind in "fc"
+        ]
+        if not inexact:
+            return result
+        target = min(inexact, key=lambda dtype: dtype.itemsize)
+    if np.can_cast(result.dtype, target, "safe"):
+        return result
+    if policy.on_widen == "raise":
+        logging.error(f"Operation widened dtype {target} to {result.dtype}")
+        raise ValueError(f"Operation widened dtype {target} to {result.dtype}")
+    return result.astype(target)
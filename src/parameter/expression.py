@@ -0,0 +1,271 @@
+# Deferred Parameter expressions
+# Author : Matthew Davidson
+# Matthew Davidson © 2022
+
+"""
+Deferred evaluation of Parameter arithmetic.
+
+Operators on an Expression build an expression tree instead of computing a
+result. Units are resolved once, as the tree is built, and evaluate() then
+computes the whole expression in a single pass over blocks of the operands, so
+intermediate arrays stay small.
+
+    result = ((a.lazy() * b + c) / d).evaluate()
+"""
+
+from __future__ import annotations
+import operator
+import numpy as np
+from parameter.mmap import ScaledArray
+from parameter.parameter import Parameter
+from parameter.units import (
+    compile_units,
+    divide_units,
+    has_same_scale,
+    is_compatible,
+    multiply_units,
+    power_units,
+)
+
+# Number of elements evaluated per block
+DEFAULT_CHUNK_SIZE = 65536
+
+UFUNCS = {
+    operator.add: np.add,
+    operator.sub: np.subtract,
+    operator.mul: np.multiply,
+    operator.truediv: np.true_divide,
+    operator.pow: np.power,
+    operator.neg: np.negative,
+    operator.abs: np.absolute,
+}
+
+
+class Expression:
+    """
+    A node of a deferred Parameter expression
+    """
+
+    # Stop NumPy from evaluating operators with ndarrays element-wise
+    __array_ufunc__ = None
+
+    units: str | None
+
+    def _binary(self, other, op_func, reflected=False):
+        other = as_expression(other)
+        left, right = (other, self) if reflected else (self, other)
+        return BinaryOperation(op_func, left, right)
+
+    def __add__(self, other):
+        return self._binary(other, operator.add)
+
+    def __radd__(self, other):
+        return self._binary(other, operator.add, reflected=True)
+
+    def __sub__(self, other):
+        return self._binary(other, operator.sub)
+
+    def __rsub__(self, other):
+        return self._binary(other, operator.sub, reflected=True)
+
+    def __mul__(self, other):
+        return self._binary(other, operator.mul)
+
+    def __rmul__(self, other):
+        return self._binary(other, operator.mul, reflected=True)
+
+    def __truediv__(self, other):
+        return self._binary(other, operator.truediv)
+
+    def __rtruediv__(self, other):
+        return self._binary(other, operator.truediv, reflected=True)
+
+    def __pow__(self, other):
+        return self._binary(other, operator.pow)
+
+    def __neg__(self):
+        return UnaryOperation(operator.neg, self)
+
+    def __abs__(self):
+        return UnaryOperation(operator.abs, self)
+
+    def leaves(self):
+        """Return the Leaf nodes of the expression"""
+        raise NotImplementedError
+
+    def _evaluate(self, index, out=None):
+        """
+        Evaluate a block of the expression, returning (value, is_temporary).
+
+        The index is None for scalar expressions, or a (slice, ndim) pair
+        selecting rows along the first axis of the ndim dimensional result.
+        """
+        raise NotImplementedError
+
+    def evaluate(self, chunk_size: int = DEFAULT_CHUNK_SIZE, out=None) -> Parameter:
+        """
+        Evaluate the expression to a Parameter.
+
+        Array operands are evaluated in blocks of about chunk_size elements along
+        their first axis, writing each block of the result into a single output
+        array, which can be given as out.
+        """
+        values = [leaf.value for leaf in self.leaves()]
+        shape = np.broadcast_shapes(*(np.shape(v) for v in values))
+        if not shape:
+            value, _ = self._evaluate(None)
+            return Parameter(value, self.units)
+        ndim = len(shape)
+
+        dtype = np.result_type(*(getattr(v, "dtype", v) for v in values), 1.0)
+        if out is None:
+            out = np.empty(shape, dtype=dtype)
+        row_size = int(np.prod(shape[1:]))
+        rows = max(1, chunk_size // max(1, row_size))
+        for start in range(0, shape[0], rows):
+            index = slice(start, min(start + rows, shape[0]))
+            self._evaluate((index, ndim), out=out[index])
+        return Parameter(out, self.units)
+
+    def __repr__(self):
+        return f"{self.__class__.__name__}({self})"
+
+
+class Leaf(Expression):
+    """
+    A Parameter, or a constant, in an expression
+    """
+
+    def __init__(self, value, units=None):
+        # Lazily scaled memory maps are only read block by block
+        if np.ndim(value) != 0 and not isinstance(value, ScaledArray):
+            value = np.asarray(value)
+        self.value = value
+        # Constants have no units, taking the units of the other operand
+        self.units = units
+
+    def leaves(self):
+        return [self]
+
+    def _evaluate(self, index, out=None):
+        value = self.value
+        if index is not None:
+            rows, ndim = index
+            # Operands that are broadcast along the first axis are not sliced
+            if np.ndim(value) == ndim and value.shape[0] > 1:
+                value = value[rows]
+        if out is not None:
+            np.copyto(out, value)
+            return out, True
+        return value, False
+
+    def __str__(self):
+        return f"{self.value}{self.units or ''}"
+
+
+class UnaryOperation(Expression):
+    def __init__(self, op_func, operand: Expression):
+        self.op_func = op_func
+        self.operand = operand
+        self.units = operand.units
+
+    def leaves(self):
+        return self.operand.leaves()
+
+    def _evaluate(self, index, out=None):
+        value, temporary = self.operand._evaluate(index)
+        if out is None and temporary:
+            out = value
+        return _result(UFUNCS[self.op_func](value, out=out))
+
+    def __str__(self):
+        return f"{self.op_func.__name__}({self.operand})"
+
+
+class BinaryOperation(Expression):
+    def __init__(self, op_func, left: Expression, right: Expression):
+        self.op_func = op_func
+        self.left = left
+        self.right = right
+        # Factor converting the right operand into the units of the left
+        self.scale = 1
+        if op_func in (operator.add, operator.sub):
+            self.units = left.units if left.units is not None else right.units
+            if left.units is not None and right.units is not None:
+                if not has_same_scale(left.units, right.units):
+                    if not is_compatible(left.units, right.units):
+                        raise ValueError("Cannot operate on parameters with different units.")
+                    self.scale = (
+                        compile_units(right.units).factor / compile_units(left.units).factor
+                    )
+        elif op_func is operator.mul:
+            self.units = _derived_units(multiply_units, left.units, right.units)
+        elif op_func is operator.truediv:
+            self.units = _derived_units(divide_units, left.units, right.units)
+        elif op_func is operator.pow:
+            if not isinstance(right, Leaf) or np.ndim(right.value) != 0:
+                raise ValueError("Can only raise an expression to a scalar power.")
+            if right.units is not None and not is_compatible(right.units, "1"):
+                raise ValueError("Cannot raise a parameter to a power with units.")
+            self.units = None if left.units is None else power_units(left.units, right.value)
+        else:
+            raise ValueError(f"Unsupported operator {op_func.__name__}")
+
+    def leaves(self):
+        return self.left.leaves() + self.right.leaves()
+
+    def _evaluate(self, index, out=None):
+        left, left_temporary = self.left._evaluate(index)
+        right, right_temporary = self.right._evaluate(index)
+        if self.scale != 1:
+            right, right_temporary = _result(
+                np.multiply(
+                    right,
+                    self.scale,
+                    out=right if right_temporary and right.dtype.kind in "fc" else None,
+                )
+            )
+        if out is None:
+            # Reuse a temporary operand for the result, if it has the result's shape
+            shape = np.broadcast_shapes(np.shape(left), np.shape(right))
+            dtype = np.result_type(left, right)
+            for value, temporary in ((left, left_temporary), (right, right_temporary)):
+                if temporary and value.shape == shape and value.dtype == dtype:
+                    out = value
+                    break
+        return _result(UFUNCS[self.op_func](left, right, out=out))
+
+    def __str__(self):
+        symbols = {
+            operator.add: "+",
+            operator.sub: "-",
+            operator.mul: "*",
+            operator.truediv: "/",
+            operator.pow: "**",
+        }
+        return f"({self.left} {symbols[self.op_func]} {self.right})"
+
+
+def _result(value):
+    """Mark arrays computed by an operation as temporaries that can be reused"""
+    return value, isinstance(value, np.ndarray)
+
+
+def _derived_units(units_func, units, other_units):
+    return units_func(
+        "1" if units is None else units, "1" if other_units is None else other_units
+    )
+
+
+def as_expression(obj) -> Expression:
+    """Wrap a Parameter or a constant as an Expression"""
+    if isinstance(obj, Expression):
+        return obj
+    if isinstance(obj, Parameter):
+        return Leaf(obj.value, obj.units)
+    return Leaf(obj)
+
+
+def lazy(param) -> Expression:
+    """Start a deferred expression from a Parameter"""
+    return as_expression(param)
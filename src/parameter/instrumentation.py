@@ -0,0 +1,171 @@
+# Instrumentation of hot paths
+# Author : Matthew Davidson
+# Matthew Davidson © 2022
+
+"""
+Opt-in counting and timing of the conversion, arithmetic, loading and grouping
+hot paths.
+
+The instrumented functions are only wrapped while instrumentation is enabled,
+so there is no cost when it is disabled. Module functions are counted when they
+are called through their module, as the package does internally, e.g.
+read_parameters_from_yaml calls loader.load_parameters_from_yaml.
+
+    from parameter import instrumentation
+
+    with instrumentation.instrument() as stats:
+        parameters = read_parameters_from_yaml("parameters.yaml").si_units
+    print(stats.snapshot())
+"""
+
+from __future__ import annotations
+from collections import Counter
+from contextlib import contextmanager
+import functools
+import importlib
+import threading
+import time
+
+# (module, class or None for module functions, attribute) of the instrumented functions
+TARGETS = [
+    ("parameter.parameter", "Parameter", "si_units"),
+    ("parameter.parameter", "Parameter", "_apply_operator"),
+    ("parameter.parameter", None, "factor"),
+    ("parameter.parameter", None, "dict_to_parameters"),
+    ("parameter.parameter", None, "read_yaml"),
+    ("parameter.loader", None, "load_parameters_from_yaml"),
+    ("parameter.parameter", "Parameters", "group_by_prefix"),
+]
+
+_lock = threading.RLock()
+_collectors = []
+_originals = []
+
+
+class Stats:
+    """
+    Call counts and cumulative times of the instrumented functions, and the
+    number of SI conversions of each unit expression
+    """
+
+    def __init__(self):
+        self.calls = Counter()
+        self.seconds = Counter()
+        self.units = Counter()
+
+    def record(self, name: str, seconds: float, units=None):
+        self.calls[name] += 1
+        self.seconds[name] += seconds
+        if units is not None:
+            self.units[units] += 1
+
+    def snapshot(self) -> dict:
+        """Return the numbers as a dictionary"""
+        return {
+            "functions": {
+                name: {"calls": calls, "seconds": self.seconds[name]}
+                for name, calls in self.calls.items()
+            },
+            "units": dict(self.units),
+        }
+
+    def reset(self):
+        self.calls.clear()
+        self.seconds.clear()
+        self.units.clear()
+
+
+_global_stats = Stats()
+
+
+def _wrap_function(func, name, record_units=False):
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        start = time.perf_counter()
+        try:
+            return func(*args, **kwargs)
+        finally:
+            elapsed = time.perf_counter() - start
+            units = str(args[0].units) if record_units else None
+            for collector in _collectors:
+                collector.record(name, elapsed, units)
+
+    return wrapper
+
+
+def _patch():
+    for module_name, owner_name, attribute in TARGETS:
+        module = importlib.import_module(module_name)
+        owner = module if owner_name is None else getattr(module, owner_name)
+        name = attribute if owner_name is None else f"{owner_name}.{attribute}"
+        original = vars(owner)[attribute]
+        if isinstance(original, property):
+            wrapped = property(
+                _wrap_function(original.fget, name, record_units=attribute == "si_units"),
+                original.fset,
+                original.fdel,
+                original.__doc__,
+            )
+        else:
+            wrapped = _wrap_function(original, name)
+        setattr(owner, attribute, wrapped)
+        _originals.append((owner, attribute, original))
+
+
+def _unpatch():
+    while _originals:
+        owner, attribute, original = _originals.pop()
+        setattr(owner, attribute, original)
+
+
+def _add_collector(collector: Stats):
+    with _lock:
+        if collector in _collectors:
+            return
+        if not _collectors:
+            _patch()
+        _collectors.append(collector)
+
+
+def _remove_collector(collector: Stats):
+    with _lock:
+        if collector not in _collectors:
+            return
+        _collectors.remove(collector)
+        if not _collectors:
+            _unpatch()
+
+
+def enable():
+    """Start collecting global statistics"""
+    _add_collector(_global_stats)
+
+
+def disable():
+    """Stop collecting global statistics"""
+    _remove_collector(_global_stats)
+
+
+def is_enabled() -> bool:
+    return _global_stats in _collectors
+
+
+def snapshot() -> dict:
+    """Return the global statistics as a dictionary"""
+    return _global_stats.snapshot()
+
+
+def reset():
+    """Reset the global statistics"""
+    _global_stats.reset()
+
+
+@contextmanager
+def instrument():
+    """Collect statistics for a block of code only"""
+    stats = Stats()
+    _add_collector(stats)
+    try:
+        yield stats
+    finally:
+        _remove_collector(stats)
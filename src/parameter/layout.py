@@ -0,0 +1,165 @@
+# Binary layout of Parameters
+# Author : Matthew Davidson
+# Matthew Davidson © 2022
+
+"""
+A flat binary layout of a set of parameters, used for shared memory and
+binary files.
+
+The layout is a magic number, the length of a JSON header, the header, and
+the raw buffers of the array values, each aligned to ALIGNMENT bytes. The
+header holds the names, units and other values of the parameters, and the
+dtype, shape and offset of each array, so arrays are read back as views of
+the buffer without copying.
+"""
+
+from __future__ import annotations
+import json
+import logging
+import math
+import struct
+import numpy as np
+from parameter.parameter import (
+    Parameter,
+    Parameters,
+    is_ndarray,
+    is_scaled_array,
+    pairs_to_parameters,
+)
+
+MAGIC = b"PARAMBIN"
+FORMAT_VERSION = 1
+# Alignment of array buffers, in bytes, suitable for SIMD loads
+ALIGNMENT = 64
+
+_PREFIX = struct.Struct("<8sQ")
+_CONTAINERS = {"list": list, "tuple": tuple}
+
+
+def _align(offset: int) -> int:
+    return -(-offset // ALIGNMENT) * ALIGNMENT
+
+
+def _as_array(value):
+    """Return the value as an ndarray if it is stored as a buffer, otherwise None"""
+    if is_ndarray(value) or isinstance(value, np.generic) or is_scaled_array(value):
+        array = np.asarray(value)
+        if array.dtype.hasobject:
+            return None
+        return array
+    return None
+
+
+def plan_layout(parameters) -> tuple[bytes, list, int]:
+    """
+    Plan the layout of a set of parameters, returning the encoded header, a
+    list of (offset, array) pairs and the total size in bytes
+    """
+    entries, arrays = [], []
+    offset = 0
+    for name, param in parameters.items():
+        is_parameter = isinstance(param, Parameter)
+        value = param.value if is_parameter else param
+        entry = {"name": name}
+        if is_parameter:
+            entry["units"] = str(param.units)
+            if param._container is not None:
+                entry["container"] = param._container.__name__
+        array = _as_array(value)
+        if array is None:
+            entry["value"] = value
+        else:
+            entry.update(dtype=array.dtype.str, shape=list(array.shape), offset=offset)
+            arrays.append((offset, array))
+            offset = _align(offset + array.nbytes)
+        entries.append(entry)
+
+    header = {
+        "version": FORMAT_VERSION,
+        "groups": sorted(getattr(parameters, "groups", [])),
+        "parameters": entries,
+    }
+    try:
+        encoded = json.dumps(header).encode()
+    except TypeError as error:
+        logging.error(f"Cannot store parameter values: {error}")
+        raise ValueError(f"Cannot store parameter values: {error}") from error
+    data_offset = _align(_PREFIX.size + len(encoded))
+    arrays = [(data_offset + array_offset, array) for array_offset, array in arrays]
+    return encoded, arrays, data_offset + offset
+
+
+def write_layout(buffer, header: bytes, arrays: list):
+    """Write a planned layout into a writable buffer"""
+    _PREFIX.pack_into(buffer, 0, MAGIC, len(header))
+    buffer[_PREFIX.size : _PREFIX.size + len(header)] = header
+    for offset, array in arrays:
+        if array.size:
+            view = np.frombuffer(buffer, dtype=array.dtype, count=array.size, offset=offset)
+            view.reshape(array.shape)[...] = array
+
+
+def write_layout_to_file(file, header: bytes, arrays: list, size: int):
+    """Write a planned layout to a binary file, from its current position"""
+    start = file.tell()
+    file.write(_PREFIX.pack(MAGIC, len(header)))
+    file.write(header)
+    for offset, array in arrays:
+        file.write(bytes(start + offset - file.tell()))
+        file.write(np.ascontiguousarray(array).reshape(-1).view(np.uint8).data)
+    file.write(bytes(start + size - file.tell()))
+
+
+def read_header(buffer) -> tuple[dict, int]:
+    """Read the header of a layout, returning it and the offset of the array data"""
+    magic, length = _PREFIX.unpack_from(buffer, 0)
+    if magic != MAGIC:
+        logging.error("Not a parameter layout")
+        raise ValueError("Not a parameter layout")
+    header = json.loads(bytes(buffer[_PREFIX.size : _PREFIX.size + length]))
+    if header["version"] != FORMAT_VERSION:
+        logging.error(f"Unsupported parameter layout version {header['version']}")
+        raise ValueError(f"Unsupported parameter layout version {header['version']}")
+    return header, _align(_PREFIX.size + length)
+
+
+def _array_at(buffer, dtype, shape, offset):
+    """Return a view of an array in the buffer"""
+    count = math.prod(shape)
+    if not count:
+        return np.empty(shape, dtype=dtype)
+    if isinstance(buffer, np.ndarray):
+        # Views keep the type of the buffer, so the arrays of a memmap are memmaps
+        return np.ndarray.__new__(type(buffer), shape, dtype, buffer=buffer, offset=offset)
+    return np.frombuffer(buffer, dtype=dtype, count=count, offset=offset).reshape(shape)
+
+
+def parameters_from_layout(buffer, object_type=Parameters) -> Parameters:
+    """
+    Read the parameters of a layout, with array values as views of the buffer.
+
+    The buffer is a buffer object or a uint8 ndarray, and the arrays are
+    read-only if the buffer is.
+    """
+    header, data_offset = read_header(buffer)
+    pairs = []
+    for entry in header["parameters"]:
+        if "offset" in entry:
+            dtype = np.dtype(entry["dtype"])
+            shape = tuple(entry["shape"])
+            value = _array_at(buffer, dtype, shape, data_offset + entry["offset"])
+            if not shape:
+                value = value[()]
+        else:
+            value = entry["value"]
+        if "units" not in entry:
+            pairs.append((entry["name"], value))
+            continue
+        param = Parameter(value, entry["units"])
+        if "container" in entry:
+            param._container = _CONTAINERS[entry["container"]]
+        pairs.append((entry["name"], param))
+    parameters = pairs_to_parameters(pairs, object_type)
+    if header["groups"]:
+        parameters = parameters.group_by_prefix()
+    return parameters
@@ -0,0 +1,246 @@
+# Streaming YAML loader
+# Author : Matthew Davidson
+# Matthew Davidson © 2022
+
+"""
+Load Parameters from a yaml file by walking its event stream.
+
+Nested mappings are flattened as they are parsed, so each leaf becomes a
+(key, Parameter) pair without first building the whole document as nested
+dictionaries. The C LibYAML parser is used when PyYAML was built with it.
+Values tagged !npy are loaded from .npy files as read-only memory maps.
+
+    for key, param in iter_parameters_from_yaml("parameters.yaml"):
+        ...
+"""
+
+from __future__ import annotations
+import logging
+from pathlib import Path
+from typing import Iterator
+import yaml
+from parameter.parameter import (
+    Parameter,
+    Parameters,
+    pairs_to_parameters,
+    resolve_path,
+    to_parameter,
+)
+
+try:
+    SafeLoader = yaml.CSafeLoader
+except AttributeError:
+    SafeLoader = yaml.SafeLoader
+
+_MERGE_TAG = "tag:yaml.org,2002:merge"
+
+
+class Loader(SafeLoader):
+    """
+    A safe loader with a !npy tag, which loads a .npy file, relative to the
+    yaml file, as a read-only memory map:
+
+        stiffness: [!npy maps/stiffness.npy, N/mm]
+    """
+
+    def __init__(self, stream, base_path: Path | None = None):
+        super().__init__(stream)
+        self.base_path = base_path
+
+
+def _construct_npy(loader, node):
+    from parameter.mmap import load_npy
+
+    path = Path(loader.construct_scalar(node))
+    if not path.is_absolute() and loader.base_path is not None:
+        path = loader.base_path / path
+    return load_npy(path)
+
+
+Loader.add_constructor("!npy", _construct_npy)
+
+
+def _join(prefix, key, sep):
+    return f"{prefix}{sep}{key}" if prefix else key
+
+
+class _EventReader:
+    """Construct leaf values and flattened keys from the events of a yaml stream"""
+
+    def __init__(self, stream, sep="__", base_path=None):
+        self.loader = Loader(stream, base_path)
+        self.sep = sep
+        self.anchors = {}
+
+    def close(self):
+        self.loader.dispose()
+
+    def expect(self, event_type, description):
+        event = self.loader.get_event()
+        if not isinstance(event, event_type):
+            logging.error(f"Expected {description}, found {event}")
+            raise ValueError(f"Expected {description}, found {event}")
+        return event
+
+    def start_document(self) -> bool:
+        """Move to the root node of the document, returning False for an empty stream"""
+        self.expect(yaml.StreamStartEvent, "the start of the stream")
+        if self.loader.check_event(yaml.StreamEndEvent):
+            return False
+        self.expect(yaml.DocumentStartEvent, "the start of a document")
+        return True
+
+    def end_document(self):
+        self.expect(yaml.DocumentEndEvent, "the end of the document")
+        self.expect(yaml.StreamEndEvent, "a single document")
+
+    def start_mapping(self):
+        event = self.loader.get_event()
+        if not isinstance(event, yaml.MappingStartEvent):
+            value = self.construct(event)
+            logging.error(f"Expected a mapping of parameters, found {value!r}")
+            raise ValueError(f"Expected a mapping of parameters, found {value!r}")
+        return event
+
+    def construct(self, event):
+        """Construct the value of a node, given its first event"""
+        if isinstance(event, yaml.AliasEvent):
+            return self.anchors[event.anchor]
+        if isinstance(event, yaml.ScalarEvent):
+            value = self.construct_scalar(event)
+        elif isinstance(event, yaml.SequenceStartEvent):
+            value = []
+            while not self.loader.check_event(yaml.SequenceEndEvent):
+                value.append(self.construct(self.loader.get_event()))
+            self.loader.get_event()
+        else:
+            value, merged = {}, {}
+            while not self.loader.check_event(yaml.MappingEndEvent):
+                key_event = self.loader.get_event()
+                if self.is_merge(key_event):
+                    merged.update(_merged_mappings(self.construct(self.loader.get_event())))
+                else:
+                    value[self.construct(key_event)] = self.construct(self.loader.get_event())
+            self.loader.get_event()
+            value = {**merged, **value}
+        if event.anchor is not None:
+            self.anchors[event.anchor] = value
+        return value
+
+    def is_merge(self, event) -> bool:
+        return isinstance(event, yaml.ScalarEvent) and self.scalar_tag(event) == _MERGE_TAG
+
+    def scalar_tag(self, event):
+        if event.tag is None or event.tag == "!":
+            return self.loader.resolve(yaml.ScalarNode, event.value, event.implicit)
+        return event.tag
+
+    def construct_scalar(self, event):
+        tag = self.scalar_tag(event)
+        constructors = self.loader.yaml_constructors
+        constructor = constructors.get(tag, constructors[None])
+        # Constructed directly, as construct_object would keep every node alive
+        return constructor(self.loader, yaml.ScalarNode(tag, event.value, style=event.style))
+
+    def iter_mapping(self, prefix=""):
+        """
+        Yield the flattened (key, value) pairs of the mapping being read, up to
+        and including its end event.
+
+        Explicit keys take precedence over merged ones, so once a merge key is
+        read the rest of the mapping is buffered, and merged keys are yielded
+        at its end unless the mapping sets them.
+        """
+        loader = self.loader
+        streamed, merged, explicit = set(), None, {}
+        while not loader.check_event(yaml.MappingEndEvent):
+            key_event = loader.get_event()
+            if self.is_merge(key_event):
+                merged = {**(merged or {}), **_merged_mappings(self.construct(loader.get_event()))}
+                continue
+            key = self.construct(key_event)
+            event = loader.get_event()
+            if merged is not None:
+                explicit[key] = self.construct(event)
+                continue
+            streamed.add(key)
+            if isinstance(event, yaml.MappingStartEvent) and event.anchor is None:
+                yield from self.iter_mapping(_join(prefix, key, self.sep))
+            else:
+                value = self.construct(event)
+                if isinstance(value, dict):
+                    yield from _flatten(value, _join(prefix, key, self.sep), self.sep)
+                else:
+                    yield _join(prefix, key, self.sep), value
+        loader.get_event()
+        if merged is not None:
+            remaining = {key: value for key, value in merged.items() if key not in streamed}
+            yield from _flatten({**remaining, **explicit}, prefix, self.sep)
+
+
+def _merged_mappings(value) -> dict:
+    """Combine the mappings of a merge key, earlier mappings taking precedence"""
+    merged = {}
+    for mapping in reversed(value) if isinstance(value, list) else [value]:
+        merged.update(mapping)
+    return merged
+
+
+def _flatten(mapping: dict, prefix, sep):
+    for key, value in mapping.items():
+        if isinstance(value, dict):
+            yield from _flatten(value, _join(prefix, key, sep), sep)
+        else:
+            yield _join(prefix, key, sep), value
+
+
+def iter_parameters_from_yaml(filepath: str | Path, sep="__") -> Iterator[tuple[str, Parameter]]:
+    """
+    Yield the flattened (key, Parameter) pairs of a yaml file as they are parsed
+    """
+    path = resolve_path(filepath)
+    with open(path, "rb") as file:
+        reader = _EventReader(file, sep=str(sep), base_path=path.parent)
+        try:
+            if not reader.start_document():
+                return
+            reader.start_mapping()
+            for key, value in reader.iter_mapping():
+                yield key, to_parameter(value)
+            reader.end_document()
+        finally:
+            reader.close()
+
+
+def iter_parameter_sets_from_yaml(
+    filepath: str | Path, sep="__", object_type=Parameters
+) -> Iterator[tuple[str, Parameters]]:
+    """
+    Yield the (name, Parameters) pairs of a yaml file holding a mapping of
+    parameter sets
+    """
+    path = resolve_path(filepath)
+    with open(path, "rb") as file:
+        reader = _EventReader(file, sep=str(sep), base_path=path.parent)
+        try:
+            if not reader.start_document():
+                return
+            reader.start_mapping()
+            while not reader.loader.check_event(yaml.MappingEndEvent):
+                name = reader.construct(reader.loader.get_event())
+                reader.start_mapping()
+                pairs = ((key, to_parameter(value)) for key, value in reader.iter_mapping())
+                yield name, pairs_to_parameters(pairs, object_type)
+            reader.loader.get_event()
+            reader.end_document()
+        finally:
+            reader.close()
+
+
+def load_parameters_from_yaml(
+    filepath: str | Path, sep="__", object_type=Parameters
+) -> Parameters:
+    """
+    Load a yaml file to a Parameters object in a single pass
+    """
+    return pairs_to_parameters(iter_parameters_from_yaml(filepath, sep=sep), object_type)
@@ -0,0 +1,105 @@
+# Memory-mapped Parameter values
+# Author : Matthew Davidson
+# Matthew Davidson © 2022
+
+"""
+Large array values stored in .npy files, loaded as read-only memory maps.
+
+Converting a memory-mapped value of at least LAZY_SCALING_BYTES to other
+units gives a ScaledArray, which applies the conversion factor to each block
+as it is read, so tables larger than memory never have to be loaded as a
+whole. Smaller values are converted to ordinary ndarrays.
+
+    stiffness = Parameter(load_npy("stiffness.npy"), "N/mm")
+    for rows, block in stiffness.si_units.value.chunks():
+        ...
+"""
+
+from __future__ import annotations
+from pathlib import Path
+import numpy as np
+from numpy.lib.mixins import NDArrayOperatorsMixin
+
+# Number of elements read per block
+DEFAULT_CHUNK_SIZE = 1 << 20
+# Size from which memory-mapped arrays are converted lazily, smaller arrays are
+# converted to ordinary ndarrays
+LAZY_SCALING_BYTES = 1 << 26
+
+
+def load_npy(filepath: str | Path) -> np.memmap:
+    """Load a .npy file as a read-only memory map"""
+    return np.load(filepath, mmap_mode="r")
+
+
+class ScaledArray(NDArrayOperatorsMixin):
+    """
+    A read-only array whose elements are multiplied by a factor as they are read.
+
+    Indexing and chunks() scale only the selected elements. Multiplying or
+    dividing by a scalar gives another ScaledArray, while other operations,
+    and np.asarray, scale the whole array.
+    """
+
+    def __init__(self, base, factor):
+        if isinstance(base, ScaledArray):
+            base, factor = base.base, base.factor * factor
+        self.base = base
+        self.factor = factor
+
+    @property
+    def shape(self) -> tuple:
+        return self.base.shape
+
+    @property
+    def ndim(self) -> int:
+        return self.base.ndim
+
+    @property
+    def size(self) -> int:
+        return self.base.size
+
+    @property
+    def dtype(self) -> np.dtype:
+        return np.result_type(self.base.dtype, self.factor)
+
+    def __len__(self):
+        return len(self.base)
+
+    def __getitem__(self, index) -> np.ndarray:
+        return np.multiply(self.base[index], self.factor)
+
+    def __array__(self, dtype=None, copy=None):
+        if copy is False:
+            raise ValueError("A ScaledArray cannot be converted to an array without a copy")
+        return self.write(np.empty(self.shape, dtype=dtype or self.dtype))
+
+    def __array_ufunc__(self, ufunc, method, *inputs, **kwargs):
+        if method == "__call__" and not kwargs and len(inputs) == 2:
+            left, right = inputs
+            if ufunc is np.multiply and np.ndim(right if left is self else left) == 0:
+                return ScaledArray(self, right if left is self else left)
+            if ufunc is np.true_divide and left is self and np.ndim(right) == 0:
+                return ScaledArray(self, 1 / right)
+        inputs = [np.asarray(x) if isinstance(x, ScaledArray) else x for x in inputs]
+        return getattr(ufunc, method)(*inputs, **kwargs)
+
+    def chunks(self, chunk_size: int = DEFAULT_CHUNK_SIZE):
+        """Yield (rows, block) pairs of scaled blocks of about chunk_size elements"""
+        if self.ndim == 0:
+            yield (), self[()]
+            return
+        row_size = max(1, self.size // max(1, self.shape[0]))
+        rows = max(1, chunk_size // row_size)
+        for start in range(0, self.shape[0], rows):
+            index = slice(start, min(start + rows, self.shape[0]))
+            yield index, self[index]
+
+    def write(self, out, factor=1, chunk_size: int = DEFAULT_CHUNK_SIZE):
+        """Write the scaled array, further multiplied by factor, into out block by block"""
+        for index, block in self.chunks(chunk_size):
+            np.multiply(block, factor, out=out[index])
+        return out
+
+    def __repr__(self):
+        return f"ScaledArray({self.base!r}, {self.factor!r})"
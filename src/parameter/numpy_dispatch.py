@@ -0,0 +1,392 @@
+# NumPy dispatch for Parameter
+# Author : Matthew Davidson
+# Matthew Davidson © 2022
+
+"""
+Implementations of the NumPy __array_ufunc__ and __array_function__ protocols
+for Parameter, so that NumPy functions operate on the underlying values while
+checking and propagating units.
+"""
+
+from __future__ import annotations
+import numpy as np
+import logging
+from parameter.parameter import Parameter
+from parameter.units import (
+    compile_units,
+    divide_units,
+    has_same_scale,
+    intern_units,
+    is_compatible,
+    multiply_units,
+    power_units,
+)
+
+HANDLED_FUNCTIONS = {}
+
+
+def convert_value(param, units):
+    """Get the value of a parameter in the given units"""
+    if not isinstance(param, Parameter):
+        return param
+    if has_same_scale(param.units, units):
+        return param.value
+    if not is_compatible(param.units, units):
+        raise ValueError(f"Cannot convert units {param.units} to {units}.")
+    return param.value * (compile_units(param.units).factor / compile_units(units).factor)
+
+
+def _values(inputs):
+    return [x.value if isinstance(x, Parameter) else x for x in inputs]
+
+
+def _units(x):
+    return x.units if isinstance(x, Parameter) else "1"
+
+
+def _first_units(inputs):
+    return next(x.units for x in inputs if isinstance(x, Parameter))
+
+
+def _same_units(inputs):
+    """Convert all inputs to the units of the first Parameter"""
+    units = _first_units(inputs)
+    return [convert_value(x, units) for x in inputs], units
+
+
+def _compared(inputs):
+    values, _ = _same_units(inputs)
+    return values, None
+
+
+def _preserved(inputs):
+    return _values(inputs), _units(inputs[0])
+
+
+def _multiplied(inputs):
+    return _values(inputs), multiply_units(_units(inputs[0]), _units(inputs[1]))
+
+
+def _divided(inputs):
+    return _values(inputs), divide_units(_units(inputs[0]), _units(inputs[1]))
+
+
+def _powered(exponent):
+    def rule(inputs):
+        return _values(inputs), power_units(_units(inputs[0]), exponent)
+
+    return rule
+
+
+def _power(inputs):
+    base, exponent = inputs
+    exponent = convert_value(exponent, "1")
+    if np.ndim(exponent) != 0:
+        raise ValueError("Cannot raise a parameter to an array of powers.")
+    return [_values([base])[0], exponent], power_units(_units(base), exponent)
+
+
+def _dimensionless(result_units):
+    def rule(inputs):
+        return [convert_value(x, "1") for x in inputs], result_units
+
+    return rule
+
+
+def _angle(inputs):
+    (x,) = inputs
+    if isinstance(x, Parameter) and not is_compatible(x.units, "1"):
+        x = Parameter(convert_value(x, "rad"), "rad")
+    return [x.value if isinstance(x, Parameter) else x], "1"
+
+
+def _arctan2(inputs):
+    values, _ = _same_units(inputs)
+    return values, "rad"
+
+
+def _raw(inputs):
+    return _values(inputs), None
+
+
+UFUNC_RULES = {
+    **{
+        ufunc: _same_units
+        for ufunc in (
+            np.add,
+            np.subtract,
+            np.maximum,
+            np.minimum,
+            np.fmax,
+            np.fmin,
+            np.hypot,
+            np.remainder,
+            np.fmod,
+            np.floor_divide,
+            np.copysign,
+            np.nextafter,
+        )
+    },
+    **{
+        ufunc: _compared
+        for ufunc in (
+            np.equal,
+            np.not_equal,
+            np.less,
+            np.less_equal,
+            np.greater,
+            np.greater_equal,
+        )
+    },
+    **{
+        ufunc: _preserved
+        for ufunc in (
+            np.negative,
+            np.positive,
+            np.absolute,
+            np.fabs,
+            np.rint,
+            np.floor,
+            np.ceil,
+            np.trunc,
+            np.conjugate,
+        )
+    },
+    **{
+        ufunc: _raw
+        for ufunc in (np.isnan, np.isinf, np.isfinite, np.signbit, np.sign)
+    },
+    **{
+        ufunc: _dimensionless("1")
+        for ufunc in (
+            np.exp,
+            np.exp2,
+            np.expm1,
+            np.log,
+            np.log2,
+            np.log10,
+            np.log1p,
+            np.sinh,
+            np.cosh,
+            np.tanh,
+        )
+    },
+    **{
+        ufunc: _dimensionless("rad")
+        for ufunc in (np.arcsin, np.arccos, np.arctan)
+    },
+    **{ufunc: _angle for ufunc in (np.sin, np.cos, np.tan)},
+    np.multiply: _multiplied,
+    np.matmul: _multiplied,
+    np.divide: _divided,
+    np.reciprocal: _powered(-1),
+    np.sqrt: _powered(0.5),
+    np.cbrt: _powered(1 / 3),
+    np.square: _powered(2),
+    np.power: _power,
+    np.arctan2: _arctan2,
+}
+
+# Ufuncs whose reductions keep the units of the input
+REDUCING_UFUNCS = {np.add, np.maximum, np.minimum, np.fmax, np.fmin}
+
+
+def array_ufunc(ufunc, method, inputs, kwargs):
+    """Apply a ufunc to Parameter inputs"""
+    if method == "__call__":
+        rule = UFUNC_RULES.get(ufunc)
+    elif method in ("reduce", "accumulate") and ufunc in REDUCING_UFUNCS:
+        rule = _preserved
+    else:
+        rule = None
+    if rule is None:
+        return NotImplemented
+
+    if method == "__call__" and any(
+        not isinstance(x, (Parameter, int, float)) for x in inputs
+    ):
+        # As for Parameter operators, values other than numbers are taken to be
+        # in SI units, so that the result does not depend on the operand order
+        inputs = [x.si_units if isinstance(x, Parameter) else x for x in inputs]
+    out = kwargs.get("out")
+    if out is not None:
+        kwargs["out"] = tuple(_values(out))
+    values, units = rule(inputs)
+    result = getattr(ufunc, method)(*values, **kwargs)
+    if units is None:
+        return result
+    if out is not None and isinstance(out[0], Parameter):
+        out[0].units = intern_units(units)
+        return out[0]
+    return Parameter(result, units)
+
+
+def array_function(func, args, kwargs):
+    """Apply a NumPy function to Parameter arguments"""
+    implementation = HANDLED_FUNCTIONS.get(func)
+    if implementation is None:
+        return _dimensionless_function(func, args, kwargs)
+    return implementation(*args, **kwargs)
+
+
+def _map_parameters(obj, convert):
+    """Apply convert to the Parameters of an argument, including those in lists and tuples"""
+    if isinstance(obj, Parameter):
+        return convert(obj)
+    if isinstance(obj, (list, tuple)):
+        return type(obj)(_map_parameters(x, convert) for x in obj)
+    return obj
+
+
+def _dimensionless_function(func, args, kwargs):
+    """
+    Apply a NumPy function without a unit rule to the values of dimensionless
+    Parameters, raising ValueError for Parameters with units
+    """
+
+    def convert(param):
+        if not is_compatible(param.units, "1"):
+            logging.error(f"Cannot apply {func.__name__} to a parameter in {param.units}")
+            raise ValueError(f"Cannot apply {func.__name__} to a parameter in {param.units}")
+        return convert_value(param, "1")
+
+    args = _map_parameters(args, convert)
+    kwargs = {key: _map_parameters(value, convert) for key, value in kwargs.items()}
+    return func(*args, **kwargs)
+
+
+def implements(*numpy_functions):
+    """Register an implementation of NumPy functions for Parameter"""
+
+    def decorator(func):
+        for numpy_function in numpy_functions:
+            HANDLED_FUNCTIONS[numpy_function] = func(numpy_function)
+        return func
+
+    return decorator
+
+
+@implements(
+    np.sum,
+    np.mean,
+    np.median,
+    np.std,
+    np.min,
+    np.amin,
+    np.max,
+    np.amax,
+    np.ptp,
+    np.cumsum,
+    np.sort,
+    np.round,
+    np.around,
+    np.diff,
+    np.reshape,
+    np.ravel,
+    np.transpose,
+    np.squeeze,
+    np.expand_dims,
+    np.flip,
+    np.broadcast_to,
+    np.copy,
+    np.take,
+    np.clip,
+    np.linalg.norm,
+    np.average,
+    np.percentile,
+    np.quantile,
+    np.nansum,
+    np.nanmean,
+    np.nanmedian,
+    np.nanmin,
+    np.nanmax,
+    np.zeros_like,
+    np.ones_like,
+    np.empty_like,
+    np.full_like,
+)
+def _same_units_function(numpy_function):
+    def implementation(a, *args, **kwargs):
+        units = _first_units([a, *args])
+        args = [convert_value(x, units) for x in args]
+        return Parameter(numpy_function(convert_value(a, units), *args, **kwargs), units)
+
+    return implementation
+
+
+@implements(np.var)
+def _squared_units_function(numpy_function):
+    def implementation(a, *args, **kwargs):
+        return Parameter(numpy_function(a.value, *args, **kwargs), power_units(a.units, 2))
+
+    return implementation
+
+
+@implements(np.concatenate, np.stack, np.hstack, np.vstack, np.column_stack)
+def _joining_function(numpy_function):
+    def implementation(arrays, *args, **kwargs):
+        values, units = _same_units(list(arrays))
+        return Parameter(numpy_function(values, *args, **kwargs), units)
+
+    return implementation
+
+
+@implements(np.where)
+def _where_function(numpy_function):
+    def implementation(condition, *args, **kwargs):
+        condition = _values([condition])[0]
+        if not args:
+            return numpy_function(condition)
+        values, units = _same_units(list(args))
+        return Parameter(numpy_function(condition, *values, **kwargs), units)
+
+    return implementation
+
+
+@implements(np.interp)
+def _interp_function(numpy_function):
+    def implementation(x, xp, fp, *args, **kwargs):
+        if isinstance(x, Parameter) or isinstance(xp, Parameter):
+            x, xp = _same_units([x, xp])[0]
+        result = numpy_function(x, xp, _values([fp])[0], *args, **kwargs)
+        return Parameter(result, fp.units) if isinstance(fp, Parameter) else result
+
+    return implementation
+
+
+@implements(np.dot, np.inner, np.outer, np.cross)
+def _product_function(numpy_function):
+    def implementation(a, b, *args, **kwargs):
+        units = multiply_units(_units(a), _units(b))
+        return Parameter(numpy_function(*_values([a, b]), *args, **kwargs), units)
+
+    return implementation
+
+
+@implements(np.isclose, np.allclose, np.array_equal)
+def _comparing_function(numpy_function):
+    def implementation(a, b, *args, **kwargs):
+        return numpy_function(*_same_units([a, b])[0], *args, **kwargs)
+
+    return implementation
+
+
+@implements(
+    np.shape,
+    np.ndim,
+    np.size,
+    np.argmin,
+    np.argmax,
+    np.argsort,
+    np.nonzero,
+    np.count_nonzero,
+    np.any,
+    np.all,
+    np.argwhere,
+    np.flatnonzero,
+)
+def _raw_function(numpy_function):
+    def implementation(a, *args, **kwargs):
+        return numpy_function(a.value if isinstance(a, Parameter) else a, *args, **kwargs)
+
+    return implementation
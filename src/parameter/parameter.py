@@ -7,21 +7,40 @@ from __future__ import annotations
 from dataclasses import dataclass
 import dataclasses
 import logging
+import os
 from pathlib import Path
 import copy
-import re
-import itertools
-from collections.abc import Iterable
-from yaml import safe_load
+import tempfile
+from contextlib import suppress
+from bisect import bisect_left
+import sys
+from collections.abc import Iterable, Mapping
 import operator
-from numpy import asarray, ndarray
-from prettytable import PrettyTable
+from typing import TYPE_CHECKING
 import parameter.conversion as convert
+from parameter.dtypes import apply_dtype_policy, get_dtype_policy
+from parameter.units import (
+    compile_units,
+    conversion_factor,
+    divide_units,
+    has_same_scale,
+    intern_units,
+    is_compatible,
+    multiply_units,
+    power_units,
+)
+
+if TYPE_CHECKING:
+    from numpy import ndarray
+    from parameter.persistent import ParametersSnapshot
 
 FACTORS = convert.TO_SI_FACTOR
 UNITS = convert.TO_SI_UNITS
 EPS = 1e-10
 
+# Operators whose result units are derived from the units of both operands
+UNIT_OPERATORS = {operator.mul: multiply_units, operator.truediv: divide_units}
+
 
 def is_iterable(element):
     """Check if an element is iterable"""
@@ -35,14 +54,93 @@ def is_iterable(element):
         return 1
 
 
-def read_yaml(filepath: str | Path) -> dict:
-    """Read a yaml file and return a dictionary"""
+def resolve_path(filepath: str | Path) -> Path:
+    """Resolve paths relative to the root of the current drive to the working directory"""
     path = Path(filepath)
     if path.root == "\\":
         path = Path.cwd() / path
-    with open(path, "r") as file:
+    return path
+
+
+def write_atomic(filepath: str | Path, write):
+    """
+    Write a binary file through a temporary file, replaced in one step so
+    readers never see a partial file. write is called with the open file.
+    """
+    path = resolve_path(filepath)
+    descriptor, temporary_path = tempfile.mkstemp(dir=path.parent, prefix=path.name)
+    try:
+        with os.fdopen(descriptor, "wb") as file:
+            write(file)
+        os.replace(temporary_path, path)
+    except BaseException:
+        with suppress(OSError):
+            os.unlink(temporary_path)
+        raise
+
+
+def read_yaml(filepath: str | Path) -> dict:
+    """Read a yaml file and return a dictionary"""
+    from yaml import safe_load
+
+    with open(resolve_path(filepath), "r") as file:
         return safe_load(file)
 
+
+def is_ndarray(obj):
+    """Check if an object is a numpy ndarray, without importing numpy"""
+    # ndarrays can only exist once numpy has been imported
+    numpy = sys.modules.get("numpy")
+    return numpy is not None and isinstance(obj, numpy.ndarray)
+
+
+def is_scaled_array(obj):
+    """Check if an object is a lazily scaled memory-mapped array"""
+    module = sys.modules.get("parameter.mmap")
+    return module is not None and isinstance(obj, module.ScaledArray)
+
+
+def numeric_array(values, dtype=None):
+    """
+    Convert a list, or nested lists, of numbers to an ndarray, returning None
+    if the values are not numeric or not rectangular
+    """
+    import numpy as np
+
+    try:
+        array = np.asarray(values)
+    except ValueError:
+        return None
+    if array.dtype.kind not in "biufc":
+        return None
+    return array if dtype is None else array.astype(dtype, copy=False)
+
+
+def _is_mutable(value) -> bool:
+    """Check if a value can be changed in place"""
+    if is_ndarray(value):
+        return value.flags.writeable
+    return isinstance(value, (list, dict, set))
+
+
+def _is_view(value, base) -> bool:
+    """Check if an ndarray value is a view of the ndarray base"""
+    return is_ndarray(value) and sys.modules["numpy"].may_share_memory(value, base)
+
+
+def _operate(op_func, value, other):
+    """Apply an operator to two values, applying the dtype policy to ndarray results"""
+    result = op_func(value, other)
+    return apply_dtype_policy(result, value, other) if is_ndarray(result) else result
+
+
+def is_expression(obj):
+    """Check if an object is a deferred parameter.expression.Expression"""
+    # Expressions can only exist once their module has been imported
+    expression = sys.modules.get("parameter.expression")
+    return expression is not None and isinstance(obj, expression.Expression)
+
+
 class Table:
     # A simple table class
     # Intended to be a lightweight alternative to pandas.DataFrame, for the purpose of separating the data from the headers
@@ -63,51 +161,99 @@ class Table:
 
 @dataclass
 class Parameter:
+    # _container is the list or tuple type of a value converted to an ndarray
+    __slots__ = ("value", "units", "_container")
     value: float | str
     units: str
 
+    def __init__(self, value, units):
+        self._container = None
+        # Numeric lists are converted once, so that all operations are vectorized
+        if type(value) in (list, tuple) and value:
+            array = numeric_array(value, get_dtype_policy().dtype)
+            if array is not None:
+                self._container = type(value)
+                value = array
+        self.value = value
+        # Units are shared between parameters, rather than a string for each
+        self.units = intern_units(units)
+
     def __str__(self):
         return f"{self.value}{self.units}"
 
     def __repr__(self):
         return f"{self.value}{self.units}"
 
+    def __copy__(self):
+        result = self.__class__.__new__(self.__class__)
+        result.value, result.units, result._container = self.value, self.units, self._container
+        return result
+
     def __eq__(self, other):
         if isinstance(other, (int, float)):
             return (self.value - other) < EPS
+        if isinstance(other, Parameter) and has_same_scale(self.units, other.units):
+            # Fast path, no conversion is needed to compare the values
+            self_si, other_si = self, other
+        else:
+            try:
+                self_si, other_si = self.si_units, other.si_units
+            except AttributeError:
+                self_si = self.si_units
+                other_si = Parameter(other, self_si.units)
         try:
-            self_si, other_si = self.si_units, other.si_units
-        except AttributeError:
-            self_si = self.si_units
-            other_si = Parameter(other, self_si.units)
-        try:
-            return (self_si.value - other_si.value) < EPS and self_si.units == other_si.units
-        except ValueError: 
-            return (self_si.value - other_si.value).all() < EPS and self_si.units == other_si.units
+            return (self_si.value - other_si.value) < EPS and is_compatible(
+                self_si.units, other_si.units
+            )
+        except ValueError:
+            return (self_si.value - other_si.value).all() < EPS and is_compatible(
+                self_si.units, other_si.units
+            )
 
     def __ne__(self, other):
         return not self == other
 
     def _apply_operator(self, other, op_func):
         if isinstance(other, (int, float)):
-            return Parameter(op_func(self.value, other), self.units)
-        try:
-            self_si, other_si = self.si_units, other.si_units
-            if self_si.units != other_si.units and (
-                str(self_si.si_units) != "1"
-                and self_si.si_units != 1
-                or str(other_si.si_units) != "1"
-                and other_si.si_units != 1
-            ):
-                raise ValueError("Cannot operate on parameters with different units.")
-
-        except AttributeError:
+            if op_func is operator.pow:
+                return Parameter(_operate(op_func, self.value, other), power_units(self.units, other))
+            return Parameter(_operate(op_func, self.value, other), self.units)
+        if (
+            isinstance(other, Parameter)
+            and op_func is not operator.pow
+            and has_same_scale(self.units, other.units)
+        ):
+            # Fast path, operate on the values in their original units
+            if op_func in UNIT_OPERATORS:
+                units = UNIT_OPERATORS[op_func](self.units, other.units)
+            else:
+                units = self.units
+            return Parameter(_operate(op_func, self.value, other.value), units)
+        if not isinstance(other, Parameter):
+            if is_expression(other):
+                return NotImplemented
             self_si = self.si_units
-            other_si = Parameter(other, self_si.units)
-        value = op_func(
-            self_si.value, other_si.value if isinstance(other, Parameter) else other
-        )
-        return Parameter(value, self_si.units)
+            return Parameter(_operate(op_func, self_si.value, other), self_si.units)
+        self_si = self.si_units
+
+        other_si = other.si_units
+        if op_func in UNIT_OPERATORS:
+            units = UNIT_OPERATORS[op_func](self_si.units, other_si.units)
+        elif op_func is operator.pow:
+            if not is_compatible(other_si.units, "1"):
+                raise ValueError("Cannot raise a parameter to a power with units.")
+            units = power_units(self_si.units, other_si.value)
+        elif is_compatible(self_si.units, other_si.units):
+            units = self_si.units
+        else:
+            raise ValueError("Cannot operate on parameters with different units.")
+        return Parameter(_operate(op_func, self_si.value, other_si.value), units)
+
+    def lazy(self):
+        """Start a deferred expression from this Parameter, see parameter.expression"""
+        from parameter.expression import lazy
+
+        return lazy(self)
 
     def __add__(self, other):
         return self._apply_operator(other, operator.add)
@@ -125,7 +271,10 @@ class Parameter:
         return self._apply_operator(other, operator.truediv)
 
     def __rtruediv__(self, other):
-        return self._apply_operator(other, operator.truediv)
+        if isinstance(other, (int, float)):
+            return Parameter(other / self.value, power_units(self.units, -1))
+        self_si = self.si_units
+        return Parameter(other / self_si.value, power_units(self_si.units, -1))
 
     def __floordiv__(self, other):
         return self._apply_operator(other, operator.floordiv)
@@ -161,8 +310,21 @@ class Parameter:
         return iter(self.value)
 
     def to_numpy(self):
+        """Return the value as an ndarray, without copying ndarray values"""
+        from numpy import asarray
+
         return asarray(self.value)
 
+    def __array_ufunc__(self, ufunc, method, *inputs, **kwargs):
+        from parameter.numpy_dispatch import array_ufunc
+
+        return array_ufunc(ufunc, method, inputs, kwargs)
+
+    def __array_function__(self, func, types, args, kwargs):
+        from parameter.numpy_dispatch import array_function
+
+        return array_function(func, args, kwargs)
+
     def __int__(self):
         return int(self.value)
 
@@ -185,91 +347,163 @@ class Parameter:
 
         Notes
         -----
+        ndarray values that are already in SI units are not copied, the
+        returned Parameter holds a view of the same buffer.
         """
+        return self.to_si()
+
+    def to_si(self, out=None):
+        """
+        Convert to SI units, optionally writing an ndarray value into out.
+
+        Passing out=self.value converts this Parameter in place, so that no
+        temporary copy of the value is made.
+        """
+        units = compile_units(self.units)
+        value = factor(self.value, units.factor, out=out)
+        if out is not None and out is self.value:
+            self.units = intern_units(units.si_units)
+            return self
+        si = self.__class__(value, units.si_units)
+        si._container = self._container
+        return si
+
+    def to(self, units) -> Parameter:
+        """Convert to other compatible units, such as "kN.mm" """
+        converted = self.__class__(factor(self.value, conversion_factor(self.units, units)), units)
+        converted._container = self._container
+        return converted
+
+    def astype(self, dtype) -> Parameter:
+        """Return a copy of the parameter with its value cast to a numpy dtype"""
+        from numpy import asarray
+
+        value = asarray(self.value).astype(dtype)
+        converted = self.__class__(value if value.ndim else value[()], self.units)
+        converted._container = self._container
+        return converted
+
+    def export(self, preserve_container=False) -> list:
+        """
+        Return the parameter as a [value, units] pair, converting values that were
+        given as lists back to their original list or tuple if preserve_container
+        """
+        value = self.value
+        if preserve_container and self._container is not None and is_ndarray(value):
+            value = self._container(value.tolist())
+        return [value, str(self.units)]
+
+
+class PrefixIndex:
+    """
+    Index of keys by prefix, where a key such as "a__b__c" belongs to the group
+    "a__b", and the members of any prefix are found by a range lookup in the
+    sorted keys
+    """
+
+    def __init__(self, keys, sep="__"):
+        self.sep = sep
+        self.keys = list(keys)
+        self.positions = {key: i for i, key in enumerate(self.keys)}
+        self.sorted_keys = sorted(self.positions)
+        self.groups = set()
+        for key in self.sorted_keys:
+            group, _, name = key.rpartition(sep)
+            if group and name:
+                self.groups.add(group)
+
+    def members(self, prefix: str) -> list:
+        """Return the keys starting with the prefix and separator, in their original order"""
+        start = prefix + self.sep
+        stop = start[:-1] + chr(ord(start[-1]) + 1)
+        lo = bisect_left(self.sorted_keys, start)
+        hi = bisect_left(self.sorted_keys, stop, lo)
+        return sorted(self.sorted_keys[lo:hi], key=self.positions.__getitem__)
+
+
+def common_value(members: list) -> ndarray | list:
+    """
+    Combine the values of a list of parameters, as an ndarray if they are numeric
+    """
+    import numpy as np
+
+    values = [getattr(member, "value", member) for member in members]
+    try:
+        value = np.asarray(values)
+    except ValueError:
+        return values
+    if value.dtype.kind in "biufc":
+        return value
+    return values
+
+
+class SIView(Mapping):
+    """
+    Read-only view of a Parameters object in SI units.
+
+    Parameters are converted when first accessed and the conversions cached, so
+    only what is used is converted. The view follows changes to the Parameters.
+    """
+
+    def __init__(self, parameters: Parameters):
+        self._parameters = parameters
+
+    def __getitem__(self, key) -> Parameter:
+        if key not in self:
+            raise KeyError(key)
+        return self._parameters.get_si(key)
+
+    def _keys(self):
+        """The keys of the parameters, without building their prefix index"""
+        accessors = self._parameters._accessors()
+        return accessors.names if accessors else self._parameters.keys()
+
+    def __contains__(self, key):
+        return key in self._keys()
+
+    def __iter__(self):
+        return iter(self._keys())
+
+    def __len__(self):
+        return len(self._keys())
+
+    def __repr__(self):
+        return f"{self.__class__.__name__}({self._parameters!r})"
 
-        def split_string_with_separators(s: str):
-            """
-            Split a string into a list of parts, and a list of separators
-            """
-            # Define a regular expression to match separators
-            sep_pattern = r"[/.^]"
-            parts = re.split(sep_pattern, s)
-            # Use re.findall to find all occurrences of the separator pattern in the original string
-            seps = re.findall(sep_pattern, s)
-            return parts, seps
-
-        def find_indexes_of_char(string_list, char: str):
-            return [i for i, s in enumerate(string_list) if char in s]
-
-        def get_SI_factor(units):
-            """Convert the units to SI units"""
-            unit_components, separators = split_string_with_separators(str(units))
-
-            if len(separators) == 0:
-                return FACTORS[unit_components[0]]
-
-            power_idxs = find_indexes_of_char(separators, "^")
-            power_factors = [
-                FACTORS[unit_components[idx]] ** int(unit_components[idx + 1])
-                for idx in power_idxs
-            ]
-
-            multiply_idxs = find_indexes_of_char(separators, ".")
-            multiply_factors = [
-                FACTORS[unit_components[idx]] * FACTORS[unit_components[idx + 1]]
-                for idx in multiply_idxs
-            ]
-
-            divide_idxs = find_indexes_of_char(separators, "/")
-            divide_factors = [
-                FACTORS[unit_components[idx]] / FACTORS[unit_components[idx + 1]]
-                for idx in divide_idxs
-            ]
-
-            product = lambda x: x[0] * product(x[1:]) if x else 1
-            return product(power_factors + multiply_factors + divide_factors)
-
-        def get_SI_units(units):
-            """Convert the units to SI units"""
-            # Split the units by either "/" or "."
-            unit_components, separators = split_string_with_separators(str(units))
-            separators = [""] + separators
-
-            # Loop over the split components and look up their conversion factors in the mapping
-            converted_units = []
-            for component, separator in itertools.zip_longest(
-                unit_components, separators
-            ):
-                if component in UNITS:
-                    converted_units.append(UNITS[component])
-                elif component.isnumeric():
-                    if separator == "^":
-                        try:
-                            exponent = int(component)
-                            converted_units.append(str(exponent))
-                        except ValueError:
-                            raise ValueError(f"Exponent {component} is not an integer")
-                else:
-                    logging.error(f"Unit {component} not found in UNITS dictionary")
-                    raise ValueError(f"Unit {component} not found in UNITS dictionary")
-
-            while len(separators) < len(converted_units):
-                separators.append("")
-
-            # Merge the converted units back into the original units with the separator that was used
-            return "".join(
-                [
-                    val
-                    for pair in itertools.zip_longest(converted_units, separators[1:])
-                    for val in pair
-                    if val is not None
-                ]
-            )
 
-        param_new = copy.deepcopy(self)
-        param_new.value = factor(self.value, get_SI_factor(self.units))
-        param_new.units = get_SI_units(self.units)
-        return param_new
+class FieldAccessors:
+    """
+    Field names and accessors of a dataclass subclass of Parameters, generated
+    once per class
+    """
+
+    def __init__(self, cls):
+        self.names = tuple(field.name for field in dataclasses.fields(cls))
+        getter = operator.attrgetter(*self.names) if self.names else lambda obj: ()
+        # attrgetter returns a single value, rather than a tuple, for a single name
+        self.values = getter if len(self.names) != 1 else lambda obj: (getter(obj),)
+
+    def items(self, obj) -> list:
+        return list(zip(self.names, self.values(obj)))
+
+    def asdict(self, obj) -> dict:
+        return {name: _asdict_value(value) for name, value in self.items(obj)}
+
+
+def _asdict_value(value):
+    """Convert nested dataclasses to dictionaries like dataclasses.asdict, without copying the values"""
+    if type(value) is Parameter:
+        return {"value": value.value, "units": value.units}
+    if dataclasses.is_dataclass(value) and not isinstance(value, type):
+        return {
+            field.name: _asdict_value(getattr(value, field.name))
+            for field in dataclasses.fields(value)
+        }
+    if isinstance(value, dict):
+        return type(value)((k, _asdict_value(v)) for k, v in value.items())
+    if type(value) in (list, tuple):
+        return type(value)(_asdict_value(v) for v in value)
+    return value
 
 
 class Parameters(dict):
@@ -277,10 +511,26 @@ class Parameters(dict):
     Parameters class
     """
 
+    # Accessors of dataclass subclasses, or False for dictionary based classes
+    _field_accessors = False
+
     def __init__(self, *args, **kwargs):
         self.groups = []
         super().__init__(*args, **kwargs)
 
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        # Generated on first use, as the dataclass decorator runs after the class is created
+        cls._field_accessors = None
+
+    @classmethod
+    def _accessors(cls) -> FieldAccessors | bool:
+        accessors = cls._field_accessors
+        if accessors is None:
+            accessors = FieldAccessors(cls) if dataclasses.is_dataclass(cls) else False
+            cls._field_accessors = accessors
+        return accessors
+
     def table(self, header=True):
         result = [
             [parameter_name, parameter_value.value, parameter_value.units]
@@ -295,6 +545,8 @@ class Parameters(dict):
         """
         Return a pretty table of the parameters
         """
+        from prettytable import PrettyTable
+
         table = PrettyTable()
         table.field_names = ["Parameter", "Value", "Units"]
 
@@ -318,7 +570,23 @@ class Parameters(dict):
 
     @property
     def si_units(self):
-        return self.__class__(**{key: param.si_units for key, param in self.items()}).group_by_prefix()
+        """
+        Return the parameters in SI units.
+
+        Conversions are cached, so only parameters that have changed since the
+        last call are converted again, see get_si.
+        """
+        return self._with_same_keys(
+            {key: self.get_si(key) for key in self.prefix_index.keys}
+        ).group_by_prefix()
+
+    @property
+    def si_view(self) -> SIView:
+        """
+        Return a read-only mapping of the parameters in SI units, converting
+        each parameter only when it is first accessed
+        """
+        return SIView(self)
 
     @property
     def values_only(self):
@@ -326,15 +594,24 @@ class Parameters(dict):
         Return a dictionary of values in SI units only
         """
 
-        return self.__class__(**{k: v.value for k, v in self.si_units.items()}).group_by_prefix()
+        return self._with_same_keys(
+            {key: self.get_si(key).value for key in self.prefix_index.keys}
+        ).group_by_prefix()
+
+    def _with_same_keys(self, values: dict) -> Parameters:
+        """Create a new object of this class, sharing the prefix index"""
+        result = self.__class__(**values)
+        result._prefix_index = self.prefix_index
+        return result
 
     @property
     def asdict(self):
-        if dataclasses.is_dataclass(self):
-            return dataclasses.asdict(self)
+        accessors = self._accessors()
+        if accessors:
+            return accessors.asdict(self)
         else:
             return dict(**self)
-        
+
     @property
     def ungrouped_values_only(self):
         """
@@ -347,44 +624,120 @@ class Parameters(dict):
         except AttributeError:
             return self.__class__(**{k: v.value for k, v in self.items()})
 
+    @property
+    def prefix_index(self) -> PrefixIndex:
+        """
+        Index of the keys by prefix, built once and kept until keys are added or removed
+        """
+        index = self.__dict__.get("_prefix_index")
+        if index is None:
+            accessors = self._accessors()
+            keys = accessors.names if accessors else self.keys()
+            index = self._prefix_index = PrefixIndex(keys)
+        return index
+
+    @property
+    def _si_cache(self) -> dict:
+        """SI conversions of the parameters, by key"""
+        return self.__dict__.setdefault("_si_cache_entries", {})
+
+    def get_si(self, key) -> Parameter:
+        """
+        Get a parameter in SI units, converting it only if it has changed since
+        it was last converted.
+
+        A new Parameter is returned on each call. Conversions giving a new
+        mutable value, such as an ndarray converted from other units, are not
+        cached, as the value could be changed in place.
+        """
+        param = self[key]
+        entry = self._si_cache.get(key)
+        if (
+            entry is not None
+            and entry[0] is param
+            and entry[1] is param.value
+            and entry[2] == param.units
+        ):
+            return copy.copy(entry[3])
+        param_si = param.si_units
+        if _is_mutable(param_si.value) and not _is_view(param_si.value, param.value):
+            self._si_cache.pop(key, None)
+            return param_si
+        self._si_cache[key] = (param, param.value, param.units, param_si)
+        return copy.copy(param_si)
+
+    def __copy__(self):
+        result = self.__class__.__new__(self.__class__)
+        dict.update(result, self)
+        result.__dict__.update(self.__dict__)
+        result._si_cache_entries = dict(self._si_cache)
+        return result
+
+    def __setitem__(self, key, value):
+        if key not in self:
+            self._prefix_index = None
+        self._si_cache.pop(key, None)
+        super().__setitem__(key, value)
+
+    def __delitem__(self, key):
+        self._prefix_index = None
+        self._si_cache.pop(key, None)
+        super().__delitem__(key)
+
+    def update(self, *args, **kwargs):
+        for key, value in dict(*args, **kwargs).items():
+            self[key] = value
+
+    def __ior__(self, other):
+        self.update(other)
+        return self
+
+    def setdefault(self, key, default=None):
+        if key not in self:
+            self[key] = default
+        return self[key]
+
+    def pop(self, key, *args):
+        if key in self:
+            self._prefix_index = None
+            self._si_cache.pop(key, None)
+        return super().pop(key, *args)
+
+    def popitem(self):
+        self._prefix_index = None
+        key, value = super().popitem()
+        self._si_cache.pop(key, None)
+        return key, value
+
+    def clear(self):
+        self._prefix_index = None
+        self._si_cache.clear()
+        super().clear()
+
     def group_by_prefix(self) -> Parameters:
         """
         Group parameters by prefix
         """
-        if dataclasses.is_dataclass(self):
-            keys = list(dataclasses.asdict(self))
-        else:
-            keys = list(self.keys())
-
-        copy_self = copy.deepcopy(self)
-        groups = {}
-        regex = r"(\w+)__\w+"
-        matches = [re.search(regex, key) for key in keys]
-        groups = {match.group(1) for match in matches if match is not None}
-        copy_self.groups = groups
-
-        for group in groups:
-            group_units = set()
-            for key in keys:
-                if (key.startswith(group) and key != group):
-                    try:
-                        group_units.add(copy_self[key].units)
-                    except AttributeError:
-                        group_units.add('-')
+        index = self.prefix_index
+        grouped = copy.copy(self)
+        grouped.groups = set(index.groups)
+        grouped._prefix_index = index
+
+        for group in index.groups:
+            members = [self[key] for key in index.members(group)]
+            group_units = {getattr(member, "units", "-") for member in members}
             if len(group_units) > 1:
                 logging.error(
                     'Units for parameter %s are not consistent, cannot continue safely", group'
                 )
                 raise ValueError(f"Units for {group} are not consistent")
 
-            copy_self.__setattr__(
+            grouped.__setattr__(
                 group,
-                Parameter(value=self.get_common_value(group), units=group_units.pop()),
+                Parameter(value=common_value(members), units=group_units.pop()),
             )
-        # TODO need to fix bug where dataclass loses repr of parameters
-        # return dict_to_parameters(dataclasses.asdict(copy_self), object_type=copy_self.__class__)
 
-        return copy_self
+        return grouped
 
     def get_multi(self, inclusions: list) -> dict:
         """
@@ -393,41 +746,77 @@ class Parameters(dict):
 
         return {inc: self[inc] for inc in inclusions}
 
-    def get_common_value(self, prefix: str) -> list:
+    def get_common_value(self, prefix: str) -> ndarray | list:
         """
         Get the common value for a parameter
         """
-        if dataclasses.is_dataclass(self):
-            return [
-                getattr(self, name).value
-                for name in self.__dataclass_fields__
-                if name.startswith(prefix) and name != prefix
-            ]
-        try:
-            return [v.value for k, v in self.items() if k.startswith(prefix)]
-        except AttributeError:
-            return [v for k, v in self.items() if k.startswith(prefix)]
+        return common_value([self[key] for key in self.prefix_index.members(prefix)])
+
+    def snapshot(self) -> ParametersSnapshot:
+        """
+        Return an immutable snapshot of the parameters, from which modified
+        snapshots can be derived in O(changes), see parameter.persistent
+        """
+        from parameter.persistent import ParametersSnapshot
+
+        return ParametersSnapshot(self.items())
+
+    def save(self, filepath: str | Path):
+        """
+        Save the parameters to a binary file, see parameter.storage
+        """
+        from parameter.storage import save_parameters
+
+        save_parameters(self, filepath)
+
+    @classmethod
+    def load(cls, filepath: str | Path, mmap=True) -> Parameters:
+        """
+        Load parameters saved to a binary file, see parameter.storage
+        """
+        from parameter.storage import load_parameters
+
+        return load_parameters(filepath, mmap, object_type=cls)
+
+    def to(self, units: dict) -> Parameters:
+        """
+        Convert parameters to other units, given as a {key: units} dictionary,
+        keeping the other parameters as they are
+        """
+        converted = dict(self.items())
+        for key, target_units in units.items():
+            converted[key] = self[key].to(target_units)
+        return self._with_same_keys(converted)
+
+    def export(self, preserve_container=False) -> dict:
+        """
+        Return a dictionary of [value, units] pairs, see Parameter.export
+        """
+        return {key: param.export(preserve_container) for key, param in self.items()}
 
     def flatten(self):
         """
         Flatten the parameters into a dictionary
         """
-        if dataclasses.is_dataclass(self):
-            return self.__class__(**flatten_dict(dataclasses.asdict(self)))
+        accessors = self._accessors()
+        if accessors:
+            return self.__class__(**flatten_dict(accessors.asdict(self)))
         else:
             return flatten_dict(self)
 
     def items(self):
-        if dataclasses.is_dataclass(self):
-            return [(name, getattr(self, name)) for name in self.__dataclass_fields__]
+        accessors = self._accessors()
+        if accessors:
+            return accessors.items(self)
         else:
-            return [(key, self[key]) for key in self]
+            return list(super().items())
 
     def __getitem__(self, key):
-        if dataclasses.is_dataclass(self):
-            return getattr(self, key)
-        else:
+        if self._field_accessors is False:
             return super().__getitem__(key)
+        if self._accessors():
+            return getattr(self, key)
+        return super().__getitem__(key)
 
 
 
@@ -435,6 +824,8 @@ def tabulate_object_attrs(obj):
     """
     Tabulate the attributes of an object
     """
+    from prettytable import PrettyTable
+
     table = PrettyTable()
     table.field_names = ["Property", "Value"]
 
@@ -450,10 +841,33 @@ def tabulate_object_attrs(obj):
     return table
 
 
-def factor(data, factor):
-    """Factor data by a factor"""
-    if isinstance(data, ndarray):
-        return data * factor
+def factor(data, factor, out=None):
+    """
+    Factor data by a factor, writing ndarray results into out if given.
+
+    Memory-mapped arrays of at least parameter.mmap.LAZY_SCALING_BYTES are
+    factored lazily, giving a ScaledArray.
+    """
+    if is_ndarray(data):
+        if out is not None:
+            if factor == 1 and out is data:
+                return out
+            return sys.modules["numpy"].multiply(data, factor, out=out)
+        if factor == 1:
+            return data.view()
+        if isinstance(data, sys.modules["numpy"].memmap):
+            from parameter import mmap
+
+            if data.nbytes >= mmap.LAZY_SCALING_BYTES:
+                return mmap.ScaledArray(data, factor)
+        dtype = get_dtype_policy().dtype
+        if dtype is not None and data.dtype.kind in "biu":
+            return sys.modules["numpy"].multiply(data, factor, dtype=dtype)
+        return apply_dtype_policy(data * factor, data)
+    if is_scaled_array(data):
+        return data * factor if out is None else data.write(out, factor)
+    if out is not None:
+        raise TypeError("out can only be used with ndarray data")
     if isinstance(data, str):
         return data
     if is_iterable(data):
@@ -462,14 +876,38 @@ def factor(data, factor):
 
 
 def flatten_dict(d, parent_key="", sep="__"):
-    items = []
+    items = {}
+    _flatten_into(items, d, parent_key, sep)
+    return items
+
+
+def _flatten_into(items: dict, d, parent_key, sep):
+    # Nested dictionaries are written into a single dictionary, without copying
     for k, v in d.items():
         new_key = parent_key + sep + str(k) if parent_key else k
         if isinstance(v, dict):
-            items.extend(flatten_dict(v, new_key, sep=sep).items())
+            _flatten_into(items, v, new_key, sep)
         else:
-            items.append((new_key, v))
-    return dict(items)
+            items[new_key] = v
+
+
+def to_parameter(val) -> Parameter:
+    """Convert a [value, units] list, a {value, units} dictionary or a bare value to a Parameter"""
+    try:
+        return Parameter(*val)
+    except TypeError:
+        try:
+            return Parameter(**val)
+        except TypeError:
+            return Parameter(val, units="-")
+
+
+def pairs_to_parameters(pairs, object_type=Parameters) -> Parameters:
+    """Build a Parameters object from (key, Parameter) pairs"""
+    # Dataclass subclasses of Parameters only accept their fields as keywords
+    if dataclasses.is_dataclass(object_type):
+        return object_type(**dict(pairs))
+    return object_type(pairs)
 
 
 def dict_to_parameters(
@@ -482,15 +920,7 @@ def dict_to_parameters(
 ):
     """Convert a dictionary to a Parameters object"""
     flattened_dict = flatten_dict(d, parent_key=parent_key, sep=str(sep))
-    parameter_kvpairs = {}
-    for key, val in flattened_dict.items():
-        try:
-            parameter_kvpairs[key] = Parameter(*val)
-        except TypeError:
-            try:
-                parameter_kvpairs[key] = Parameter(**val)
-            except TypeError:
-                parameter_kvpairs[key] = Parameter(val, units="-")
+    parameter_kvpairs = {key: to_parameter(val) for key, val in flattened_dict.items()}
 
     parameters = object_type(
         **parameter_kvpairs
@@ -513,21 +943,41 @@ def read_parameters_from_yaml(
     group_by_prefix=False,
     convert_to_si=False,
     object_type=Parameters,
+    cache=False,
 ) -> dict | dict[dict]:
-    """Parse a yaml file to a Parameters object"""
-    parameters_dict = read_yaml(filepath)
-    return dict_to_parameters(
-        parameters_dict,
-        group_by_prefix=group_by_prefix,
-        convert_to_si=convert_to_si,
-        object_type=object_type,
-    )
+    """
+    Parse a yaml file to a Parameters object.
 
+    If cache is True, or a cache directory, the parsed parameters are cached on
+    disk and reused until the file changes (see parameter.cache).
+    """
+    if cache:
+        from parameter.cache import load_cached_parameters
 
-def read_set_of_parameters_from_yaml(filepath: str | Path) -> dict | dict[dict]:
+        parameters = load_cached_parameters(
+            filepath, cache, convert_to_si=convert_to_si, object_type=object_type
+        )
+        # Cached SI parameters only need the grouping done by si_units
+        return parameters.group_by_prefix() if group_by_prefix or convert_to_si else parameters
+
+    from parameter import loader
+
+    parameters = loader.load_parameters_from_yaml(filepath, object_type=object_type)
+    if group_by_prefix:
+        parameters = parameters.group_by_prefix()
+    return parameters.si_units if convert_to_si else parameters
+
+
+def read_set_of_parameters_from_yaml(filepath: str | Path, cache=False) -> dict | dict[dict]:
     """Parse a yaml file to a Parameters object"""
-    parameters_dict = read_yaml(filepath)
-    return dicts_to_parameters(parameters_dict)
+    if cache:
+        from parameter.cache import load_cached_parameter_sets
+
+        return load_cached_parameter_sets(filepath, cache)
+
+    from parameter import loader
+
+    return dict(loader.iter_parameter_sets_from_yaml(filepath))
 
 
 def main():
@@ -0,0 +1,350 @@
+# Persistent Parameters snapshots
+# Author : Matthew Davidson
+# Matthew Davidson © 2022
+
+"""
+Immutable snapshots of Parameters, backed by a persistent hash array mapped
+trie (HAMT).
+
+Deriving a snapshot with some keys overridden copies only the trie nodes on
+the path to each changed key, so it costs O(changes) whatever the size of the
+set, and the rest of the trie is shared with the original. Snapshots are never
+modified once created, so they can be shared between threads without locks.
+
+    shared = parameters.snapshot()
+    request_parameters = shared.update({"speed": Parameter(3, "m/s")})
+"""
+
+from __future__ import annotations
+from collections.abc import Mapping
+from parameter.parameter import Parameter, Parameters, pairs_to_parameters
+
+# Bits of the hash used at each level of the trie
+_BITS = 5
+_MASK = (1 << _BITS) - 1
+_HASH_BITS = 64
+
+
+class _BitmapNode:
+    """
+    A trie node holding up to 32 entries, each a (key, value) tuple or a child
+    node, stored compactly in the order of the bits set in the bitmap
+    """
+
+    __slots__ = ("bitmap", "entries")
+
+    def __init__(self, bitmap: int, entries: tuple):
+        self.bitmap = bitmap
+        self.entries = entries
+
+    def get(self, key, key_hash, shift, default):
+        bit = 1 << ((key_hash >> shift) & _MASK)
+        if not self.bitmap & bit:
+            return default
+        entry = self.entries[(self.bitmap & (bit - 1)).bit_count()]
+        if type(entry) is tuple:
+            return entry[1] if entry[0] is key or entry[0] == key else default
+        return entry.get(key, key_hash, shift + _BITS, default)
+
+    def assoc(self, key, value, key_hash, shift):
+        """Return the node with key set to value, and whether the key was added"""
+        bit = 1 << ((key_hash >> shift) & _MASK)
+        index = (self.bitmap & (bit - 1)).bit_count()
+        entries = self.entries
+        if not self.bitmap & bit:
+            new_entries = entries[:index] + ((key, value),) + entries[index:]
+            return _BitmapNode(self.bitmap | bit, new_entries), True
+        entry = entries[index]
+        if type(entry) is tuple:
+            if entry[0] is key or entry[0] == key:
+                if entry[1] is value:
+                    return self, False
+                new_entry, added = (key, value), False
+            else:
+                new_entry = _merge(
+                    entry, hash(entry[0]), (key, value), key_hash, shift + _BITS
+                )
+                added = True
+        else:
+            new_entry, added = entry.assoc(key, value, key_hash, shift + _BITS)
+            if new_entry is entry:
+                return self, False
+        new_entries = entries[:index] + (new_entry,) + entries[index + 1 :]
+        return _BitmapNode(self.bitmap, new_entries), added
+
+    def dissoc(self, key, key_hash, shift):
+        """Return the node without key, None if it is empty, or self if key is missing"""
+        bit = 1 << ((key_hash >> shift) & _MASK)
+        if not self.bitmap & bit:
+            return self
+        index = (self.bitmap & (bit - 1)).bit_count()
+        entry = self.entries[index]
+        if type(entry) is tuple:
+            if not (entry[0] is key or entry[0] == key):
+                return self
+            new_entry = None
+        else:
+            new_entry = entry.dissoc(key, key_hash, shift + _BITS)
+            if new_entry is entry:
+                return self
+            # A child left with a single (key, value) entry is replaced by the entry
+            if isinstance(new_entry, _BitmapNode) and len(new_entry.entries) == 1:
+                if type(new_entry.entries[0]) is tuple:
+                    new_entry = new_entry.entries[0]
+        if new_entry is None:
+            if len(self.entries) == 1:
+                return None
+            entries = self.entries[:index] + self.entries[index + 1 :]
+            return _BitmapNode(self.bitmap & ~bit, entries)
+        entries = self.entries[:index] + (new_entry,) + self.entries[index + 1 :]
+        return _BitmapNode(self.bitmap, entries)
+
+    def __iter__(self):
+        for entry in self.entries:
+            if type(entry) is tuple:
+                yield entry
+            else:
+                yield from entry
+
+
+class _CollisionNode:
+    """A node holding the (key, value) entries of keys with the same full hash"""
+
+    __slots__ = ("key_hash", "entries")
+
+    def __init__(self, key_hash: int, entries: tuple):
+        self.key_hash = key_hash
+        self.entries = entries
+
+    def _find(self, key):
+        for i, (entry_key, _) in enumerate(self.entries):
+            if entry_key is key or entry_key == key:
+                return i
+        return -1
+
+    def get(self, key, key_hash, shift, default):
+        i = self._find(key)
+        return default if i < 0 else self.entries[i][1]
+
+    def assoc(self, key, value, key_hash, shift):
+        if key_hash != self.key_hash:
+            return _merge(self, self.key_hash, (key, value), key_hash, shift), True
+        i = self._find(key)
+        if i < 0:
+            return _CollisionNode(key_hash, self.entries + ((key, value),)), True
+        if self.entries[i][1] is value:
+            return self, False
+        entries = self.entries[:i] + ((key, value),) + self.entries[i + 1 :]
+        return _CollisionNode(key_hash, entries), False
+
+    def dissoc(self, key, key_hash, shift):
+        i = self._find(key)
+        if i < 0:
+            return self
+        entries = self.entries[:i] + self.entries[i + 1 :]
+        if len(entries) == 1:
+            return entries[0]
+        return _CollisionNode(self.key_hash, entries)
+
+    def __iter__(self):
+        return iter(self.entries)
+
+
+def _merge(entry, entry_hash, other, other_hash, shift):
+    """Make a node holding two entries, a (key, value) tuple or a collision node each"""
+    if entry_hash == other_hash:
+        return _CollisionNode(entry_hash, (entry, other))
+    if shift >= _HASH_BITS:
+        # Python hashes are 64 bit, so different hashes differ before this depth
+        raise AssertionError("Hashes differ beyond the depth of the trie")
+    chunk = (entry_hash >> shift) & _MASK
+    other_chunk = (other_hash >> shift) & _MASK
+    if chunk == other_chunk:
+        child = _merge(entry, entry_hash, other, other_hash, shift + _BITS)
+        return _BitmapNode(1 << chunk, (child,))
+    entries = (entry, other) if chunk < other_chunk else (other, entry)
+    return _BitmapNode((1 << chunk) | (1 << other_chunk), entries)
+
+
+def _build(items: list, shift) -> _BitmapNode:
+    """Build a node from (hash, key, value) entries with distinct keys, in one pass per level"""
+    buckets = {}
+    for item in items:
+        chunk = (item[0] >> shift) & _MASK
+        bucket = buckets.get(chunk)
+        if bucket is None:
+            buckets[chunk] = [item]
+        else:
+            bucket.append(item)
+    bitmap, entries = 0, []
+    for chunk in sorted(buckets):
+        bucket = buckets[chunk]
+        bitmap |= 1 << chunk
+        if len(bucket) == 1:
+            entries.append(bucket[0][1:])
+        elif shift + _BITS >= _HASH_BITS:
+            # Entries that agree on every chunk have the same hash
+            entries.append(_CollisionNode(bucket[0][0], tuple(item[1:] for item in bucket)))
+        else:
+            entries.append(_build(bucket, shift + _BITS))
+    return _BitmapNode(bitmap, tuple(entries))
+
+
+_EMPTY_NODE = _BitmapNode(0, ())
+_MISSING = object()
+
+
+class PersistentMap(Mapping):
+    """
+    An immutable mapping, whose set, delete and update methods return a new
+    mapping sharing all unchanged nodes with this one
+    """
+
+    __slots__ = ("_root", "_length")
+
+    def __init__(self, items=()):
+        items = dict(items)
+        self._root = _build([(hash(key), key, value) for key, value in items.items()], 0)
+        self._length = len(items)
+
+    @classmethod
+    def _from_root(cls, root, length) -> PersistentMap:
+        result = cls.__new__(cls)
+        result._root = root
+        result._length = length
+        return result
+
+    def __getitem__(self, key):
+        value = self._root.get(key, hash(key), 0, _MISSING)
+        if value is _MISSING:
+            raise KeyError(key)
+        return value
+
+    def get(self, key, default=None):
+        return self._root.get(key, hash(key), 0, default)
+
+    def __contains__(self, key):
+        return self._root.get(key, hash(key), 0, _MISSING) is not _MISSING
+
+    def __iter__(self):
+        return (key for key, _ in self._root)
+
+    def items(self):
+        return list(self._root)
+
+    def __len__(self):
+        return self._length
+
+    def set(self, key, value) -> PersistentMap:
+        """Return a new map with key set to value"""
+        root, added = self._root.assoc(key, value, hash(key), 0)
+        if root is self._root:
+            return self
+        return self._from_root(root, self._length + added)
+
+    def delete(self, key) -> PersistentMap:
+        """Return a new map without key"""
+        root = self._root.dissoc(key, hash(key), 0)
+        if root is self._root:
+            raise KeyError(key)
+        return self._from_root(_EMPTY_NODE if root is None else root, self._length - 1)
+
+    def update(self, items=(), **kwargs) -> PersistentMap:
+        """Return a new map with the keys of items and kwargs set"""
+        root, length = self._root, self._length
+        pairs = items.items() if isinstance(items, Mapping) else items
+        for source in (pairs, kwargs.items()):
+            for key, value in source:
+                root, added = root.assoc(key, value, hash(key), 0)
+                length += added
+        return self._from_root(root, length)
+
+    def __repr__(self):
+        return f"{self.__class__.__name__}({dict(self.items())!r})"
+
+
+class ParametersSnapshot(Mapping):
+    """
+    An immutable set of parameters, that keeps the order of its keys.
+
+    The Parameter objects are shared with the Parameters the snapshot was taken
+    from, and with derived snapshots, so they should not be modified in place.
+    """
+
+    __slots__ = ("_entries", "_next_position", "_keys")
+
+    def __init__(self, parameters=()):
+        pairs = parameters.items() if isinstance(parameters, Mapping) else parameters
+        # Each key is stored with its position, so that the order of the keys is kept
+        entries = PersistentMap((key, (i, param)) for i, (key, param) in enumerate(pairs))
+        self._entries = entries
+        self._next_position = len(entries)
+        self._keys = None
+
+    @classmethod
+    def _from_entries(cls, entries, next_position) -> ParametersSnapshot:
+        result = cls.__new__(cls)
+        result._entries = entries
+        result._next_position = next_position
+        result._keys = None
+        return result
+
+    def __getitem__(self, key) -> Parameter:
+        return self._entries[key][1]
+
+    def __contains__(self, key):
+        return key in self._entries
+
+    def __len__(self):
+        return len(self._entries)
+
+    def __iter__(self):
+        return iter(self.keys())
+
+    def keys(self) -> list:
+        keys = self._keys
+        if keys is None:
+            entries = sorted(self._entries.items(), key=lambda item: item[1][0])
+            keys = self._keys = [key for key, _ in entries]
+        return keys
+
+    def items(self) -> list:
+        entries = self._entries
+        return [(key, entries[key][1]) for key in self.keys()]
+
+    def set(self, key, param: Parameter) -> ParametersSnapshot:
+        """Return a new snapshot with one parameter set"""
+        return self.update({key: param})
+
+    def update(self, overrides=(), **kwargs) -> ParametersSnapshot:
+        """
+        Return a new snapshot with the parameters of overrides and kwargs set,
+        in O(number of overrides)
+        """
+        entries, position = self._entries, self._next_position
+        pairs = overrides.items() if isinstance(overrides, Mapping) else overrides
+        for source in (pairs, kwargs.items()):
+            for key, param in source:
+                current = entries.get(key)
+                if current is None:
+                    entries = entries.set(key, (position, param))
+                    position += 1
+                elif current[1] is not param:
+                    entries = entries.set(key, (current[0], param))
+        if entries is self._entries:
+            return self
+        return self._from_entries(entries, position)
+
+    def delete(self, *keys) -> ParametersSnapshot:
+        """Return a new snapshot without the given keys"""
+        entries = self._entries
+        for key in keys:
+            entries = entries.delete(key)
+        return self._from_entries(entries, self._next_position)
+
+    def to_parameters(self, object_type=Parameters) -> Parameters:
+        """Return the parameters as a new, mutable, Parameters object"""
+        return pairs_to_parameters(self.items(), object_type)
+
+    def __repr__(self):
+        return f"{self.__class__.__name__}({dict(self.items())!r})"
@@ -0,0 +1,156 @@
+# Shared memory Parameters
+# Author : Matthew Davidson
+# Matthew Davidson © 2022
+
+"""
+Parameters published in shared memory, for process pools.
+
+The publishing process copies the parameters once into a shared memory block,
+laid out as described in parameter.layout. Workers attach to the block by name
+and get read-only Parameters whose array values are views of the shared
+memory, so no array data is pickled or copied per task. A SharedParameters
+object pickles as the name of its block, so it can be passed to tasks as is.
+
+    with SharedParameters.publish(parameters) as shared:
+        with ProcessPoolExecutor() as pool:
+            results = list(pool.map(evaluate, repeat(shared), studies))
+
+    def evaluate(shared, study):
+        parameters = shared.parameters
+        ...
+
+The publisher owns the block: closing it, or leaving the with block, unlinks
+the block once the publisher is done with it. Workers only close their view.
+"""
+
+from __future__ import annotations
+import logging
+import threading
+from multiprocessing import resource_tracker
+from multiprocessing.shared_memory import SharedMemory
+from parameter.layout import parameters_from_layout, plan_layout, write_layout
+from parameter.parameter import Parameters
+
+_attach_lock = threading.Lock()
+
+
+def _attach(name: str) -> SharedMemory:
+    """Attach to a shared memory block without registering it for cleanup by this process"""
+    try:
+        return SharedMemory(name=name, track=False)
+    except TypeError:
+        pass
+    # Before Python 3.13, attaching registers the block with the resource
+    # tracker, which unlinks it when the attaching process has its own tracker
+    # and exits, while unregistering it would drop the registration of the
+    # publisher when the tracker is shared
+    register = resource_tracker.register
+
+    def register_other(name, rtype):
+        if rtype != "shared_memory":
+            register(name, rtype)
+
+    with _attach_lock:
+        resource_tracker.register = register_other
+        try:
+            return SharedMemory(name=name)
+        finally:
+            resource_tracker.register = register
+
+
+class SharedParameters:
+    """
+    A set of parameters in a shared memory block, created by publish in the
+    owning process and by attach in the others
+    """
+
+    def __init__(self, shm: SharedMemory, owner: bool = False, object_type=Parameters):
+        self._shm = shm
+        self._name = shm.name
+        self._owner = owner
+        self._object_type = object_type
+        self._view = None
+        self._parameters = None
+        self._unlinked = False
+
+    @classmethod
+    def publish(cls, parameters, name: str = None) -> SharedParameters:
+        """Copy parameters into a new shared memory block"""
+        header, arrays, size = plan_layout(parameters)
+        shm = SharedMemory(name=name, create=True, size=max(size, 1))
+        try:
+            write_layout(shm.buf, header, arrays)
+        except BaseException:
+            shm.close()
+            shm.unlink()
+            raise
+        return cls(shm, owner=True, object_type=type(parameters))
+
+    @classmethod
+    def attach(cls, name: str, object_type=Parameters) -> SharedParameters:
+        """Attach to the shared memory block of published parameters"""
+        return cls(_attach(name), object_type=object_type)
+
+    @property
+    def name(self) -> str:
+        return self._name
+
+    @property
+    def owner(self) -> bool:
+        return self._owner
+
+    @property
+    def closed(self) -> bool:
+        return self._shm is None
+
+    @property
+    def parameters(self) -> Parameters:
+        """The parameters, with read-only array values in shared memory"""
+        if self._shm is None:
+            logging.error(f"Shared parameters {self._name} are closed")
+            raise ValueError(f"Shared parameters {self._name} are closed")
+        if self._parameters is None:
+            self._view = self._shm.buf.toreadonly()
+            self._parameters = parameters_from_layout(self._view, self._object_type)
+        return self._parameters
+
+    def close(self):
+        """
+        Release the shared memory of this process, unlinking the block if this
+        process published it.
+
+        Raises BufferError if arrays of the parameters are still referenced,
+        after unlinking the block, and close can be called again once they
+        are released.
+        """
+        if self._shm is None:
+            return
+        self._parameters = None
+        try:
+            if self._view is not None:
+                self._view.release()
+                self._view = None
+            self._shm.close()
+        finally:
+            if self._owner and not self._unlinked:
+                self._unlinked = True
+                self._shm.unlink()
+        self._shm = None
+
+    def __enter__(self) -> SharedParameters:
+        return self
+
+    def __exit__(self, *exc_info):
+        try:
+            self.close()
+        except BufferError as error:
+            # Raising here would replace any exception in flight, and the block is
+            # already unlinked, so its memory is freed with the last array
+            logging.warning(f"Shared parameters {self._name} are still referenced: {error}")
+
+    def __reduce__(self):
+        # Other processes attach to the block instead of receiving a copy
+        return self.attach, (self.name, self._object_type)
+
+    def __repr__(self):
+        return f"{self.__class__.__name__}({self._name!r}, owner={self._owner})"
@@ -0,0 +1,43 @@
+# Binary Parameters files
+# Author : Matthew Davidson
+# Matthew Davidson © 2022
+
+"""
+Parameters saved to binary files, in the layout of parameter.layout.
+
+A file holds a JSON header of names, units and groups, followed by the raw,
+aligned buffers of the array values. Loading maps the whole file into memory
+once, and the arrays are read-only memmap views of it, keeping their dtype
+and shape, so loading does not read array data until it is used. Converting
+the arrays to SI units gives ScaledArrays, see parameter.mmap.
+
+    save_parameters(parameters, "parameters.params")
+    parameters = load_parameters("parameters.params")
+"""
+
+from __future__ import annotations
+from pathlib import Path
+import numpy as np
+from parameter.layout import parameters_from_layout, plan_layout, write_layout_to_file
+from parameter.parameter import Parameters, resolve_path, write_atomic
+
+
+def save_parameters(parameters, filepath: str | Path):
+    """Save parameters to a binary file, replacing it in one step"""
+    header, arrays, size = plan_layout(parameters)
+    write_atomic(filepath, lambda file: write_layout_to_file(file, header, arrays, size))
+
+
+def load_parameters(filepath: str | Path, mmap=True, object_type=Parameters) -> Parameters:
+    """
+    Load parameters from a binary file.
+
+    With mmap, array values are read-only views of a memory map of the file,
+    otherwise the file is read once and the arrays are writable views of it.
+    """
+    path = resolve_path(filepath)
+    if mmap:
+        buffer = np.memmap(path, dtype=np.uint8, mode="r")
+    else:
+        buffer = np.fromfile(path, dtype=np.uint8)
+    return parameters_from_layout(buffer, object_type)
@@ -0,0 +1,280 @@
+# Unit expressions
+# Author : Matthew Davidson
+# Matthew Davidson © 2022
+
+from __future__ import annotations
+from functools import lru_cache
+import logging
+import re
+import sys
+from parameter.conversion import (
+    BASE_DIMENSIONS,
+    DIMENSIONLESS,
+    SI_DIMENSIONS,
+    TO_SI_FACTOR,
+    TO_SI_UNITS,
+    ConversionTable,
+)
+
+FACTORS = TO_SI_FACTOR
+UNITS = TO_SI_UNITS
+
+# Maximum number of distinct unit expressions held by the compiled unit cache
+UNIT_CACHE_SIZE = 1024
+
+# A unit symbol, preceded by a "." or "/" separator and followed by an optional "^" exponent
+_TERM_PATTERN = re.compile(r"([./]?)([^./^]+)(?:\^([+-]?\d+))?")
+_table_version = ConversionTable.version
+
+
+class Unit(str):
+    """
+    A unit expression compiled to its SI conversion factor and SI units.
+
+    Compares and hashes as the original expression, so it can be used anywhere
+    a units string is expected. The dimensions are the exponents of the
+    BASE_DIMENSIONS, or None if the SI units are not all in SI_DIMENSIONS.
+    """
+
+    factor: float
+    si_units: str
+    dimensions: tuple[int, ...] | None
+    terms: tuple[tuple[str, int], ...]
+    # ConversionTable.version the unit was compiled with
+    version: int
+
+    def __new__(cls, expression: str, factor: float, si_units: str, dimensions, terms):
+        unit = super().__new__(cls, expression)
+        unit.factor = factor
+        unit.si_units = si_units
+        unit.dimensions = dimensions
+        unit.terms = terms
+        unit.version = ConversionTable.version
+        return unit
+
+    def __reduce__(self):
+        return (compile_units, (str(self),))
+
+
+def parse_units(expression: str) -> tuple[tuple[str, int], ...]:
+    """
+    Parse a unit expression, such as "kg/m^3", into (symbol, exponent) terms
+    """
+    terms = []
+    pos = 0
+    while pos < len(expression) or not terms:
+        match = _TERM_PATTERN.match(expression, pos)
+        if match is None or (match.group(1) == "") != (pos == 0):
+            raise ValueError(f"Cannot parse units {expression}")
+        separator, symbol, exponent = match.groups()
+        exponent = int(exponent) if exponent else 1
+        terms.append((symbol, -exponent if separator == "/" else exponent))
+        pos = match.end()
+    return tuple(terms)
+
+
+def format_units(terms, dimensionless: str = "1") -> str:
+    """
+    Format (symbol, exponent) terms as a unit expression, such as "kg/m^3"
+    """
+
+    def format_term(symbol, exponent):
+        return symbol if exponent == 1 else f"{symbol}^{exponent}"
+
+    numerator = [format_term(s, e) for s, e in terms if e > 0]
+    denominator = [format_term(s, -e) for s, e in terms if e < 0]
+    if not numerator and not denominator:
+        return dimensionless
+    return ".".join(numerator or ["1"]) + "".join("/" + t for t in denominator)
+
+
+def _merge_terms(terms) -> dict:
+    """Sum the exponents of repeated symbols, dropping dimensionless symbols"""
+    merged = {}
+    for symbol, exponent in terms:
+        if symbol not in DIMENSIONLESS:
+            merged[symbol] = merged.get(symbol, 0) + exponent
+    return {symbol: exponent for symbol, exponent in merged.items() if exponent != 0}
+
+
+def _SI_factor(terms):
+    numerator, denominator = 1, 1
+    for symbol, exponent in terms:
+        if exponent == 1:
+            numerator *= FACTORS[symbol]
+        elif exponent > 0:
+            numerator *= FACTORS[symbol] ** exponent
+        else:
+            denominator *= FACTORS[symbol] ** -exponent
+    return numerator / denominator if denominator != 1 else numerator
+
+
+def _SI_terms(terms) -> dict:
+    si_terms = []
+    for symbol, exponent in terms:
+        if symbol not in UNITS:
+            logging.error(f"Unit {symbol} not found in UNITS dictionary")
+            raise ValueError(f"Unit {symbol} not found in UNITS dictionary")
+        for si_symbol, si_exponent in parse_units(str(UNITS[symbol])):
+            si_terms.append((si_symbol, si_exponent * exponent))
+    return _merge_terms(si_terms)
+
+
+def _dimensions(si_terms: dict):
+    dimensions = [0] * len(BASE_DIMENSIONS)
+    for symbol, exponent in si_terms.items():
+        if symbol not in SI_DIMENSIONS:
+            return None
+        for i, d in enumerate(SI_DIMENSIONS[symbol]):
+            dimensions[i] += d * exponent
+    return tuple(dimensions)
+
+
+@lru_cache(maxsize=UNIT_CACHE_SIZE)
+def _compile(expression: str) -> Unit:
+    terms = parse_units(expression)
+    factor = _SI_factor(terms)
+    si_terms = _SI_terms(terms)
+    dimensionless = str(UNITS[terms[0][0]]) if len(terms) == 1 else "1"
+    return Unit(
+        expression,
+        factor,
+        format_units(si_terms.items(), dimensionless),
+        _dimensions(si_terms),
+        tuple(_merge_terms(terms).items()),
+    )
+
+
+def compile_units(units) -> Unit:
+    """
+    Compile a unit expression, such as "kg/m^3", to a Unit.
+
+    Compiled units are held in a bounded LRU cache, which is cleared whenever
+    the conversion tables are modified.
+    """
+    if ConversionTable.version != _table_version:
+        _clear_caches()
+    elif type(units) is Unit and units.version == _table_version:
+        return units
+    return _compile(units if isinstance(units, str) else str(units))
+
+
+# Interned unit strings, by unit expression
+_interned = {}
+
+
+def intern_units(units):
+    """
+    Return the shared, plain str object for a unit expression, so that
+    parameters with the same units share one string. The compiled Unit is
+    held by compile_units. Other objects are returned as is.
+    """
+    try:
+        return _interned[units]
+    except (KeyError, TypeError):
+        pass
+    if not isinstance(units, str):
+        return units
+    interned = sys.intern(str(units))
+    if len(_interned) >= UNIT_CACHE_SIZE:
+        _interned.clear()
+    _interned[units] = interned
+    return interned
+
+
+def _clear_caches():
+    global _table_version
+    _compile.cache_clear()
+    _conversion_factor.cache_clear()
+    _interned.clear()
+    _table_version = ConversionTable.version
+
+
+def get_SI_factor(units) -> float:
+    """Get the factor converting the units to SI units"""
+    return compile_units(units).factor
+
+
+def get_SI_units(units) -> str:
+    """Convert the units to SI units"""
+    return compile_units(units).si_units
+
+
+def is_compatible(units, other_units) -> bool:
+    """Check if two unit expressions have the same dimensions"""
+    units, other_units = compile_units(units), compile_units(other_units)
+    if units.dimensions is None or other_units.dimensions is None:
+        return units.si_units == other_units.si_units
+    return units.dimensions == other_units.dimensions
+
+
+def has_same_scale(units, other_units) -> bool:
+    """
+    Check if values in two unit expressions can be combined without conversion,
+    because the expressions are identical or compatible with the same SI factor
+    """
+    if units == other_units:
+        return True
+    units, other_units = compile_units(units), compile_units(other_units)
+    return units.factor == other_units.factor and is_compatible(units, other_units)
+
+
+@lru_cache(maxsize=UNIT_CACHE_SIZE)
+def _conversion_factor(units: str, target_units: str) -> float:
+    if not is_compatible(units, target_units):
+        logging.error(f"Cannot convert units {units} to {target_units}")
+        raise ValueError(f"Cannot convert units {units} to {target_units}")
+    return compile_units(units).factor / compile_units(target_units).factor
+
+
+def conversion_factor(units, target_units) -> float:
+    """
+    Get the factor converting values in units to target_units, checking that
+    the units are compatible. Factors are cached for each pair of expressions.
+    """
+    if ConversionTable.version != _table_version:
+        _clear_caches()
+    return _conversion_factor(str(units), str(target_units))
+
+
+def _combine_units(units, other_units, sign) -> Unit:
+    terms = dict(compile_units(units).terms)
+    for symbol, exponent in compile_units(other_units).terms:
+        terms[symbol] = terms.get(symbol, 0) + sign * exponent
+    return compile_units(format_units(terms.items()))
+
+
+def multiply_units(units, other_units) -> Unit:
+    """Get the units of the product of two quantities"""
+    return _combine_units(units, other_units, 1)
+
+
+def divide_units(units, other_units) -> Unit:
+    """Get the units of the quotient of two quantities"""
+    return _combine_units(units, other_units, -1)
+
+
+def power_units(units, exponent) -> Unit:
+    """Get the units of a quantity raised to a power"""
+    units = compile_units(units)
+    if not units.terms:
+        return units
+    terms = []
+    for symbol, symbol_exponent in units.terms:
+        new_exponent = symbol_exponent * exponent
+        if new_exponent != int(new_exponent):
+            raise ValueError(f"Cannot raise units {units} to the power {exponent}")
+        terms.append((symbol, int(new_exponent)))
+    return compile_units(format_units(terms))
+
+
+def unit_cache_info():
+    """Return the hits, misses, maxsize and currsize of the compiled unit cache"""
+    return _compile.cache_info()
+
+
+def clear_unit_cache():
+    """Clear the compiled unit, conversion factor and interned unit caches"""
+    _compile.cache_clear()
+    _conversion_factor.cache_clear()
+    _interned.clear()
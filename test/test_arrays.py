@@ -0,0 +1,52 @@
+import numpy as np
+import pytest
+
+from parameter.arrays import ParameterArray, to_si_batch
+from parameter.parameter import (
+    Parameter,
+    Parameters,
+    read_set_of_parameters_from_yaml,
+)
+
+
+def test_parameter_array_round_trip():
+    parameters = read_set_of_parameters_from_yaml("test/input_file.yaml")["test_parameters"]
+    array = ParameterArray.from_parameters(parameters)
+    assert len(array) == len(parameters)
+    assert array.values.dtype == np.float64
+    assert sorted(array.units) == ["-", "deg", "g", "m", "mm"]
+    assert array["nacelle_radius"] == Parameter(150, "mm")
+    assert array["string_parameter"] is parameters["string_parameter"]
+
+    round_trip = array.to_parameters()
+    assert isinstance(round_trip, Parameters)
+    assert list(round_trip) == list(parameters)
+    for key, param in parameters.items():
+        assert round_trip[key].units == param.units
+        assert round_trip[key].value == param.value
+
+
+def test_parameter_array_si_units(test_params):
+    parameters = Parameters(**test_params, s=Parameter("string", "-"))
+    array_si = ParameterArray.from_parameters(parameters).si_units
+    assert "m" in array_si.units and "mm" not in array_si.units
+
+    expected = parameters.si_units
+    for key, param in array_si.to_parameters().items():
+        assert param.units == expected[key].units
+        if key == "s":
+            assert param.value == "string"
+        else:
+            assert np.isclose(param.value, expected[key].value, rtol=1e-12)
+
+
+def test_to_si_batch():
+    values, units = to_si_batch(np.array([1, 2, 3, 4]), np.array(["mm", "kN.mm", "mm", "-"]))
+    np.testing.assert_allclose(values, [0.001, 2, 0.003, 4])
+    assert units.tolist() == ["m", "N.m", "m", "-"]
+
+    rows, units = to_si_batch(np.ones((2, 3)), ["mm", "m"])
+    np.testing.assert_allclose(rows, [[0.001] * 3, [1] * 3])
+
+    with pytest.raises(ValueError):
+        to_si_batch([1, 2], ["m"])
@@ -0,0 +1,33 @@
+import importlib.util
+import json
+from pathlib import Path
+
+spec = importlib.util.spec_from_file_location(
+    "run_benchmarks", Path(__file__).parents[1] / "benchmarks" / "run_benchmarks.py"
+)
+run_benchmarks = importlib.util.module_from_spec(spec)
+spec.loader.exec_module(run_benchmarks)
+
+
+def test_benchmarks_report(tmp_path):
+    output = tmp_path / "report.json"
+    argv = ["--sizes", "10", "--repeats", "1", "--array-length", "1000", "--output", str(output)]
+    assert run_benchmarks.main(argv) == 0
+    report = json.loads(output.read_text())
+    names = {result["name"] for result in report["results"]}
+    assert names == set(run_benchmarks.BENCHMARKS) | set(run_benchmarks.DTYPE_BENCHMARKS)
+    kinds = {result["kind"] for result in report["results"]}
+    assert kinds == {"scalar", "ndarray", "float64", "float32"}
+
+
+def test_benchmarks_compare():
+    baseline = {"results": [{"name": "a", "kind": "scalar", "size": 10, "seconds": 1.0}]}
+    report = {
+        "results": [
+            {"name": "a", "kind": "scalar", "size": 10, "seconds": 1.5},
+            {"name": "b", "kind": "scalar", "size": 10, "seconds": 1.0},
+        ]
+    }
+    regressions = run_benchmarks.compare(report, baseline, threshold=0.2)
+    assert [r["name"] for r in regressions] == ["a"]
+    assert run_benchmarks.compare(report, baseline, threshold=0.6) == []
@@ -0,0 +1,54 @@
+from parameter import cache
+from parameter.parameter import read_parameters_from_yaml, read_set_of_parameters_from_yaml
+
+
+def as_tuples(parameters):
+    return {key: (param.value, str(param.units)) for key, param in parameters.items()}
+
+
+def test_cached_parameters(tmp_path, monkeypatch):
+    path = tmp_path / "parameters.yaml"
+    path.write_text(
+        "arm:\n  length: [150, mm]\n  radius: [20, mm]\nangles:\n  0: [0, deg]\n  1: [120, deg]\n"
+    )
+    expected = read_parameters_from_yaml(path, convert_to_si=True)
+
+    parameters = read_parameters_from_yaml(path, convert_to_si=True, cache=True)
+    cache_file = cache.cache_path(path, "si")
+    assert cache_file.parent == tmp_path / cache.CACHE_DIRECTORY
+    assert cache_file.exists()
+    assert as_tuples(parameters) == as_tuples(expected)
+
+    # Later loads do not parse the yaml file
+    def fail(*args, **kwargs):
+        raise AssertionError("parsed")
+
+    monkeypatch.setattr("parameter.loader.load_parameters_from_yaml", fail)
+    parameters = read_parameters_from_yaml(path, convert_to_si=True, cache=True)
+    assert as_tuples(parameters) == as_tuples(expected)
+    assert parameters.groups == expected.groups
+
+
+def test_stale_and_corrupt_cache(tmp_path):
+    path = tmp_path / "parameters.yaml"
+    path.write_text("a: [1, mm]\n")
+    assert read_parameters_from_yaml(path, cache=tmp_path / "cache")["a"].value == 1
+
+    path.write_text("a: [2, mm]\n")
+    assert read_parameters_from_yaml(path, cache=tmp_path / "cache")["a"].value == 2
+
+    cache_file = cache.cache_path(path, "parameters", tmp_path / "cache")
+    cache_file.write_bytes(b"\x00garbage")
+    assert read_parameters_from_yaml(path, cache=tmp_path / "cache")["a"].value == 2
+    assert cache_file.read_bytes() != b"\x00garbage"
+
+
+def test_cached_parameter_sets(tmp_path):
+    path = tmp_path / "sets.yaml"
+    path.write_text("first:\n  a: [1, m]\nsecond:\n  b: [2, s]\n")
+    for _ in range(2):
+        sets = read_set_of_parameters_from_yaml(path, cache=True)
+        assert {name: as_tuples(p) for name, p in sets.items()} == {
+            "first": {"a": (1, "m")},
+            "second": {"b": (2, "s")},
+        }
@@ -0,0 +1,58 @@
+import numpy as np
+import pytest
+
+from parameter.dtypes import dtype_policy, get_dtype_policy, set_dtype_policy
+from parameter.parameter import Parameter
+
+
+def test_float32_preserved():
+    param = Parameter(np.ones(4, dtype=np.float32), "mm")
+    assert param.si_units.value.dtype == np.float32
+    assert (param + Parameter(1, "m")).value.dtype == np.float32
+    assert (param * param).value.dtype == np.float32
+
+
+def test_policy_dtype():
+    narrow = Parameter(np.ones(4, dtype=np.float32), "m")
+    wide = Parameter(np.ones(4), "m")
+    with dtype_policy("float32"):
+        assert get_dtype_policy().on_widen == "allow"
+        assert (narrow + wide).value.dtype == np.float64
+    with dtype_policy("float32", on_widen="cast"):
+        assert Parameter([1, 2, 3], "mm").value.dtype == np.float32
+        assert Parameter(np.arange(3), "mm").si_units.value.dtype == np.float32
+        assert (narrow + wide).value.dtype == np.float32
+    assert Parameter([1.0, 2.0], "mm").value.dtype == np.float64
+
+
+def test_on_widen():
+    narrow = Parameter(np.ones(4, dtype=np.float32), "m")
+    wide = Parameter(np.ones(4), "m")
+    assert (narrow + wide).value.dtype == np.float64
+    with dtype_policy(on_widen="cast"):
+        assert (narrow + wide).value.dtype == np.float32
+        assert (narrow * np.float64(2)).value.dtype == np.float32
+    with dtype_policy(on_widen="raise"):
+        with pytest.raises(ValueError):
+            narrow + wide
+        assert (narrow + narrow).value.dtype == np.float32
+    with pytest.raises(ValueError):
+        dtype_policy(on_widen="never").__enter__()
+
+
+def test_global_policy():
+    previous = set_dtype_policy("float32", on_widen="raise")
+    try:
+        assert get_dtype_policy().dtype == "float32"
+        with pytest.raises(ValueError):
+            Parameter(np.ones(2, dtype=np.float32), "m") + Parameter(np.ones(2), "m")
+    finally:
+        set_dtype_policy(previous.dtype, previous.on_widen)
+    assert get_dtype_policy().on_widen == "allow"
+
+
+def test_astype():
+    param = Parameter(np.arange(3), "mm").astype("float32")
+    assert param.value.dtype == np.float32
+    assert param.units == "mm"
+    assert Parameter(1.5, "m").astype("float32").value == np.float32(1.5)
@@ -0,0 +1,35 @@
+import numpy as np
+import pytest
+
+from parameter.expression import Expression
+from parameter.parameter import Parameter
+
+
+def test_deferred_expression():
+    a = Parameter(np.random.rand(1000, 10), "N")
+    b = Parameter(np.random.rand(1000, 10), "mm")
+    c = Parameter(np.random.rand(10), "N.m")
+    d = Parameter(2, "s")
+
+    expression = (a.lazy() * b + c) / d
+    assert isinstance(expression, Expression)
+    assert expression.units == "N.mm/s"
+
+    result = expression.evaluate(chunk_size=1000)
+    expected = (a.value * b.value + c.value * 1000) / d.value
+    assert result.units == "N.mm/s"
+    assert np.allclose(result.value, expected)
+    assert np.allclose(expression.evaluate().value, expected)
+
+    # constants, unary operators and powers
+    result = (-(a.lazy() ** 2) + 1).evaluate(chunk_size=64)
+    assert result.units == "N^2"
+    assert np.allclose(result.value, 1 - a.value**2)
+
+    # scalar expressions
+    assert (Parameter(2, "m").lazy() + Parameter(50, "cm")).evaluate() == Parameter(2.5, "m")
+
+
+def test_deferred_expression_units_checked_once():
+    with pytest.raises(ValueError):
+        Parameter(np.ones(3), "m").lazy() + Parameter(np.ones(3), "s")
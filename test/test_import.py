@@ -0,0 +1,25 @@
+import subprocess
+import sys
+
+# Loose enough for slow CI machines, the absence of the heavy modules is checked separately
+IMPORT_TIME_BUDGET = 0.25
+
+SCRIPT = """
+import sys, time
+start = time.perf_counter()
+import parameter.parameter
+from parameter.parameter import Parameter
+elapsed = time.perf_counter() - start
+Parameter(1, "mm").si_units + Parameter(2, "m")
+print(elapsed)
+print(",".join(m for m in ("numpy", "yaml", "prettytable") if m in sys.modules))
+"""
+
+
+def test_bare_import_is_lightweight():
+    result = subprocess.run(
+        [sys.executable, "-c", SCRIPT], capture_output=True, text=True, check=True
+    )
+    elapsed, loaded = result.stdout.splitlines()
+    assert loaded == ""
+    assert float(elapsed) < IMPORT_TIME_BUDGET
@@ -0,0 +1,40 @@
+from parameter import instrumentation
+from parameter.parameter import Parameter, Parameters, read_parameters_from_yaml
+
+
+def test_instrument_block():
+    si_units = Parameter.si_units
+    with instrumentation.instrument() as stats:
+        parameters = read_parameters_from_yaml("test/input_file.yaml")
+        Parameter(1, "mm") + Parameter(1, "m")
+        Parameter(2, "mm").si_units
+    Parameter(3, "mm").si_units
+
+    # functions are restored once the block ends
+    assert Parameter.si_units is si_units
+
+    numbers = stats.snapshot()
+    functions = numbers["functions"]
+    assert functions["load_parameters_from_yaml"]["calls"] == 1
+    assert functions["Parameter._apply_operator"]["calls"] == 1
+    assert functions["Parameter.si_units"]["calls"] == 3
+    assert functions["factor"]["calls"] == 3
+    assert functions["load_parameters_from_yaml"]["seconds"] > 0
+    assert numbers["units"] == {"mm": 2, "m": 1}
+    assert len(parameters) == 13
+
+
+def test_global_stats():
+    instrumentation.reset()
+    assert not instrumentation.is_enabled()
+    instrumentation.enable()
+    try:
+        Parameters(a=Parameter(1, "mm"), b__x=Parameter(2, "mm")).group_by_prefix()
+    finally:
+        instrumentation.disable()
+    Parameters(a=Parameter(1, "mm")).group_by_prefix()
+
+    functions = instrumentation.snapshot()["functions"]
+    assert functions["Parameters.group_by_prefix"]["calls"] == 1
+    instrumentation.reset()
+    assert instrumentation.snapshot() == {"functions": {}, "units": {}}
@@ -0,0 +1,92 @@
+import pytest
+
+from parameter.loader import (
+    iter_parameter_sets_from_yaml,
+    iter_parameters_from_yaml,
+    load_parameters_from_yaml,
+)
+from parameter.parameter import (
+    Parameters,
+    dict_to_parameters,
+    read_set_of_parameters_from_yaml,
+    read_yaml,
+)
+
+
+def as_tuples(parameters):
+    return {key: (param.value, param.units) for key, param in parameters.items()}
+
+
+def test_matches_legacy_loader():
+    legacy = dict_to_parameters(read_yaml("test/input_file.yaml"))
+    parameters = load_parameters_from_yaml("test/input_file.yaml")
+    assert isinstance(parameters, Parameters)
+    assert list(parameters) == list(legacy)
+    assert as_tuples(parameters) == as_tuples(legacy)
+
+
+def test_iter_parameters(tmp_path):
+    path = tmp_path / "parameters.yaml"
+    path.write_text(
+        "base: &base\n"
+        "  x: [1, mm]\n"
+        "  y: [2, mm]\n"
+        "a:\n"
+        "  <<: *base\n"
+        "  y: [3, mm]\n"
+        "b: *base\n"
+        "c: 4\n"
+    )
+    pairs = iter_parameters_from_yaml(path)
+    assert next(pairs)[0] == "base__x"
+    lengths = {key: param for key, param in pairs if param.units == "mm"}
+    assert as_tuples(lengths) == {
+        "base__y": (2, "mm"),
+        "a__x": (1, "mm"),
+        "a__y": (3, "mm"),
+        "b__x": (1, "mm"),
+        "b__y": (2, "mm"),
+    }
+    assert as_tuples(load_parameters_from_yaml(path))["c"] == (4, "-")
+
+
+def test_explicit_keys_override_merge_keys(tmp_path):
+    path = tmp_path / "parameters.yaml"
+    path.write_text(
+        "base: &base\n"
+        "  x: [1, mm]\n"
+        "  y: [2, mm]\n"
+        "  z:\n"
+        "    w: [5, mm]\n"
+        "a:\n"
+        "  y: [3, mm]\n"
+        "  <<: *base\n"
+        "  z:\n"
+        "    v: [6, mm]\n"
+        "b: {<<: *base, y: [4, mm]}\n"
+    )
+    legacy = dict_to_parameters(read_yaml(path))
+    parameters = load_parameters_from_yaml(path)
+    assert as_tuples(parameters) == as_tuples(legacy)
+    assert as_tuples(parameters)["a__y"] == (3, "mm")
+    assert "a__z__w" not in parameters
+    # Keys keep their order when the merge key comes first
+    assert [key for key in parameters if key.startswith("b__")] == [
+        key for key in legacy if key.startswith("b__")
+    ]
+
+
+def test_parameter_sets(tmp_path):
+    path = tmp_path / "sets.yaml"
+    path.write_text("first:\n  a: [1, m]\nsecond:\n  b:\n    c: [2, s]\n")
+    sets = read_set_of_parameters_from_yaml(path)
+    assert list(sets) == ["first", "second"]
+    assert as_tuples(sets["second"]) == {"b__c": (2, "s")}
+    assert dict(iter_parameter_sets_from_yaml(path)).keys() == sets.keys()
+
+
+def test_not_a_mapping(tmp_path):
+    path = tmp_path / "list.yaml"
+    path.write_text("- [1, m]\n")
+    with pytest.raises(ValueError):
+        load_parameters_from_yaml(path)
@@ -0,0 +1,69 @@
+import numpy as np
+import pytest
+
+from parameter.loader import load_parameters_from_yaml
+from parameter import mmap
+from parameter.mmap import ScaledArray, load_npy
+from parameter.parameter import Parameter
+
+
+@pytest.fixture
+def lazy(monkeypatch):
+    monkeypatch.setattr(mmap, "LAZY_SCALING_BYTES", 0)
+
+
+@pytest.fixture
+def table_path(tmp_path):
+    path = tmp_path / "maps" / "stiffness.npy"
+    path.parent.mkdir()
+    np.save(path, np.arange(12, dtype=np.float64).reshape(6, 2))
+    return path
+
+
+def test_npy_tag(tmp_path, table_path):
+    path = tmp_path / "parameters.yaml"
+    path.write_text("stiffness: [!npy maps/stiffness.npy, N/mm]\n")
+    stiffness = load_parameters_from_yaml(path)["stiffness"]
+    assert isinstance(stiffness.value, np.memmap)
+    assert not stiffness.value.flags.writeable
+    assert stiffness.units == "N/mm"
+
+
+def test_lazy_si_conversion(lazy, table_path):
+    table = load_npy(table_path)
+    si = Parameter(table, "N/mm").si_units
+    assert isinstance(si.value, ScaledArray)
+    assert si.units == "N/m"
+    expected = np.arange(12).reshape(6, 2) * 1000.0
+    np.testing.assert_array_equal(si.value[2:4], expected[2:4])
+    np.testing.assert_array_equal(si.to_numpy(), expected)
+
+    blocks = list(si.value.chunks(chunk_size=4))
+    assert [rows for rows, _ in blocks] == [slice(0, 2), slice(2, 4), slice(4, 6)]
+    np.testing.assert_array_equal(np.concatenate([b for _, b in blocks]), expected)
+
+    # Scalar factors stay lazy, other operations read the whole array
+    assert isinstance(si.value * 2, ScaledArray)
+    np.testing.assert_array_equal(si.value + 1, expected + 1)
+
+
+def test_small_arrays_convert_eagerly(table_path):
+    si = Parameter(load_npy(table_path), "N/mm").si_units
+    assert not isinstance(si.value, ScaledArray)
+    assert si.value.sum() == 66000
+    expected = np.arange(12).reshape(6, 2) * 1000.0
+    assert si.export(preserve_container=True)[0].tolist() == expected.tolist()
+
+
+def test_chunked_expression(lazy, table_path):
+    si = Parameter(load_npy(table_path), "N/mm").si_units
+    out = np.empty((6, 2))
+    result = (si.lazy() * 2 + Parameter(1, "kN/m")).evaluate(chunk_size=4, out=out)
+    assert result.value is out
+    np.testing.assert_array_equal(out, np.arange(12).reshape(6, 2) * 2000.0 + 1000.0)
+
+
+def test_to_si_out(lazy, table_path):
+    out = np.empty((6, 2))
+    si = Parameter(load_npy(table_path), "N/mm").si_units.to_si(out=out)
+    np.testing.assert_array_equal(si.value, np.arange(12).reshape(6, 2) * 1000.0)
@@ -0,0 +1,77 @@
+import numpy as np
+import pytest
+
+from parameter.parameter import Parameter
+
+
+def test_ufuncs():
+    area = Parameter(np.array([1.0, 4.0, 9.0]), "m^2")
+    assert np.sqrt(area).units == "m"
+    assert np.all(np.sqrt(area).value == [1, 2, 3])
+    assert np.square(Parameter(2, "mm")) == Parameter(4, "mm^2")
+    assert np.add(Parameter(1, "m"), Parameter(500, "mm")) == Parameter(1.5, "m")
+    # Plain arrays are in SI units whichever side of the operator they are on
+    for mixed in (np.ones(3) + Parameter(1, "mm"), Parameter(1, "mm") + np.ones(3)):
+        assert mixed.units == "m"
+        np.testing.assert_allclose(mixed.value, 1.001)
+    assert np.arange(3) * Parameter(2, "mm") == Parameter(2, "mm") * np.arange(3)
+    assert np.isclose(np.sin(Parameter(90, "deg")).value, 1)
+    assert np.all(np.less(Parameter(np.ones(3), "m"), Parameter(np.ones(3), "km")))
+    assert np.add.reduce(area) == Parameter(14, "m^2")
+
+    out = Parameter(np.zeros(3), "-")
+    assert np.multiply(area, area, out=out) is out
+    assert out.units == "m^4"
+    assert type(out.units) is str
+
+    with pytest.raises(ValueError):
+        np.add(Parameter(1, "m"), Parameter(1, "s"))
+    with pytest.raises(ValueError):
+        np.exp(Parameter(1, "m"))
+
+
+def test_array_functions():
+    a = Parameter(np.array([1.0, 2.0]), "m")
+    b = Parameter(np.array([3000.0, 4000.0]), "mm")
+    assert np.sum(a) == Parameter(3, "m")
+    assert np.mean(b).units == "mm"
+    assert np.var(a).units == "m^2"
+    assert np.shape(a) == (2,)
+
+    joined = np.concatenate([a, b])
+    assert joined.units == "m"
+    assert np.all(joined.value == [1, 2, 3, 4])
+    assert np.dot(a, Parameter(np.ones(2), "N")).units == "m.N"
+    assert np.allclose(a, Parameter(np.array([1000.0, 2000.0]), "mm"))
+
+
+def test_unhandled_functions():
+    a = Parameter(np.array([1.0, 2.0, 3.0]), "m")
+    b = Parameter(np.array([4000.0, 5000.0, 6000.0]), "mm")
+    ratio = Parameter(np.array([1.0, 2.0, 3.0]), "-")
+
+    chosen = np.where(a.value > 1.5, a, b)
+    assert chosen.units == "m"
+    np.testing.assert_allclose(chosen.value, [4, 2, 3])
+    assert np.any(a) and np.all(a)
+    assert np.average(b, weights=[1, 1, 2]) == Parameter(5.25, "m")
+    assert np.percentile(a, 50) == Parameter(2, "m")
+    zeros = np.zeros_like(b)
+    assert zeros.units == "mm" and np.all(zeros.value == 0)
+    interpolated = np.interp(Parameter(1500, "mm"), a, b)
+    assert interpolated.units == "mm"
+    assert interpolated.value == pytest.approx(4500)
+
+    # Functions without a unit rule apply to dimensionless values only
+    np.testing.assert_allclose(np.cumprod(ratio), [1, 2, 6])
+    with pytest.raises(ValueError):
+        np.cumprod(a)
+
+
+def test_to_numpy_without_copy():
+    data = np.random.rand(10)
+    param = Parameter(data, "mm")
+    assert param.to_numpy() is data
+    # Parameters in different units are not mixed into one array of values
+    mixed = np.array([Parameter(1, "m"), Parameter(500, "mm")])
+    assert mixed.dtype == object
@@ -1,3 +1,5 @@
+import pytest
+
 from parameter.parameter import Parameters, Parameter, read_set_of_parameters_from_yaml
 
 def test_parameter(test_params):
@@ -18,7 +20,7 @@ def test_parameter(test_params):
     assert test_params['f'].si_units.units == "rad/s"
     assert test_params['g'].si_units.value - 1.7453292519943295 < eps
     assert test_params['g'].si_units.units == "rad/s"
-    assert test_params['h'].si_units.value - 1.0000000000000002e-07 < eps
+    assert abs(test_params['h'].si_units.value - 1e8) < 1e-6
     assert test_params['h'].si_units.units == "kg/m^3"
     assert test_params['i'].si_units.value == 0.1
     assert test_params['i'].si_units.units == "kg/m^3"
@@ -52,6 +54,124 @@ def test_group_by_prefix():
     print(grouped.si_units.table)
     print(grouped.si_units.values_only)
 
+def test_group_by_prefix_index():
+    import numpy as np
+
+    parameters = Parameters(
+        a__b__c=Parameter(1, "mm"),
+        a__b__d=Parameter(2, "mm"),
+        a__x=Parameter(3, "mm"),
+        cog__x=Parameter(50, "mm"),
+        cog__y=Parameter(-1, "mm"),
+        cog_offset=Parameter(5, "m"),
+    )
+    grouped = parameters.group_by_prefix()
+    assert grouped.groups == {"a__b", "a", "cog"}
+    assert isinstance(grouped.cog.value, np.ndarray)
+    assert list(grouped.cog.value) == [50, -1]
+    assert grouped.cog.units == "mm"
+    assert list(grouped.a.value) == [1, 2, 3]
+    assert grouped["cog__x"] is parameters["cog__x"]
+    assert not hasattr(parameters, "cog")
+
+    # each grouping has its own set of groups
+    grouped.groups.add("extra")
+    assert parameters.group_by_prefix().groups == {"a__b", "a", "cog"}
+    assert parameters.prefix_index.groups == {"a__b", "a", "cog"}
+
+    # the index follows keys being added and removed
+    parameters["cog__z"] = Parameter(0, "mm")
+    assert list(parameters.get_common_value("cog")) == [50, -1, 0]
+    del parameters["cog__x"]
+    assert list(parameters.group_by_prefix().cog.value) == [-1, 0]
+    parameters |= {"cog__w": Parameter(1, "mm")}
+    assert list(parameters.get_common_value("cog")) == [-1, 0, 1]
+    assert parameters.si_units["cog__w"] == Parameter(0.001, "m")
+
+
+def test_cached_si_units():
+    from parameter import instrumentation
+
+    parameters = Parameters(**{f"p{i}": Parameter(i, "mm") for i in range(100)})
+    assert parameters.si_units["p3"] == Parameter(0.003, "m")
+
+    with instrumentation.instrument() as stats:
+        parameters["p3"] = Parameter(4, "mm")
+        parameters["p4"].value = 5
+        del parameters["p5"]
+        si_units = parameters.si_units
+        values = parameters.values_only
+    assert stats.snapshot()["functions"]["Parameter.si_units"]["calls"] == 2
+    assert si_units["p3"] == Parameter(0.004, "m")
+    assert si_units["p4"] == Parameter(0.005, "m")
+    assert "p5" not in si_units
+    assert values["p3"] == 0.004
+
+
+def test_si_view():
+    from parameter import instrumentation
+
+    parameters = Parameters(**{f"p{i}": Parameter(i, "mm") for i in range(100)})
+    view = parameters.si_view
+    with instrumentation.instrument() as stats:
+        assert view["p3"] == Parameter(0.003, "m")
+        assert view["p3"] is not view["p3"]
+        assert view["p3"].value == view["p3"].value
+        assert "p4" in view and "p100" not in view
+    assert stats.snapshot()["functions"]["Parameter.si_units"]["calls"] == 1
+
+    with pytest.raises(KeyError):
+        view["p100"]
+    with pytest.raises(TypeError):
+        view["p3"] = Parameter(1, "m")
+
+    eager = parameters.si_units
+    assert len(view) == len(eager)
+    assert list(view) == list(eager)
+    assert [(k, v.value, v.units) for k, v in view.items()] == [
+        (k, v.value, v.units) for k, v in eager.items()
+    ]
+
+    parameters["p3"] = Parameter(1, "km")
+    assert view["p3"] == Parameter(1000, "m")
+
+    # Lookups do not build the prefix index
+    fresh = Parameters(**{f"p{i}": Parameter(i, "mm") for i in range(100)})
+    assert fresh.si_view["p3"] == Parameter(0.003, "m")
+    assert "p3" in fresh.si_view and len(fresh.si_view) == 100
+    assert fresh.__dict__.get("_prefix_index") is None
+
+
+def test_si_units_are_new_objects():
+    import numpy as np
+
+    parameters = Parameters(a=Parameter(1, "mm"), b=Parameter(np.ones(2), "m"))
+    parameters["c"] = Parameter(np.ones(2), "mm")
+    parameters["c"].value.setflags(write=False)
+    si = parameters.si_units
+    si["a"].value = 99
+    si["b"].units = "km"
+    si["c"].value[0] = 5
+    assert parameters.si_units["a"] == Parameter(0.001, "m")
+    assert parameters.si_view["b"].units == "m"
+    assert parameters.values_only["c"][0] == pytest.approx(0.001)
+
+
+def test_si_cache_in_place_changes():
+    import numpy as np
+
+    parameters = Parameters(q=Parameter(np.zeros(3), "mm"), r=Parameter(np.zeros(3), "m"))
+    assert parameters.si_view["q"].value[0] == 0
+    parameters["q"].value[0] = 100
+    parameters["r"].value[0] = 2
+    assert parameters.get_si("q").value[0] == pytest.approx(0.1)
+    assert parameters.si_view["q"].value[0] == pytest.approx(0.1)
+    assert parameters.values_only["q"][0] == pytest.approx(0.1)
+    # SI values are views of the values, so they can be cached
+    assert parameters.get_si("r").value[0] == 2
+    assert np.shares_memory(parameters.get_si("r").value, parameters["r"].value)
+
+
 def test_dataclass_inheritance():
     from dataclasses import dataclass
 
@@ -95,7 +215,29 @@ def test_array_parameters():
     assert param_a == param_b
 
 
-    
+def test_array_conversion_without_copy():
+    import numpy as np
+    data = np.random.rand(10, 10)
+
+    # values already in SI units share the original buffer
+    param_si = Parameter(data, "N.m").si_units
+    assert param_si.units == "N.m"
+    assert np.shares_memory(param_si.value, data)
+
+    # converting into an output buffer
+    out = np.empty_like(data)
+    param_si = Parameter(data, "mm").to_si(out=out)
+    assert param_si.value is out
+    assert np.allclose(out, data / 1000)
+
+    # converting in place
+    param = Parameter(data.copy(), "mm")
+    buffer = param.value
+    assert param.to_si(out=param.value) is param
+    assert param.value is buffer
+    assert param.units == "m"
+    assert np.allclose(param.value, data / 1000)
+
 
 def test_operators():
     p_a = Parameter(1, "m")
@@ -111,8 +253,8 @@ def test_operators():
     assert p_c < p_d
     assert p_a + p_b == Parameter(1.025, "m")
     assert p_a - p_b == Parameter(0.975, "m")
-    assert p_a * p_b == Parameter(0.025, "m") # TODO: this should be m^2
-    assert p_a / p_b == Parameter(40, "m")
+    assert p_a * p_b == Parameter(0.025, "m^2")
+    assert p_a / p_b == Parameter(40, "1")
     assert p_a + p_b == p_b + p_a
     assert p_e < p_d
     assert p_e > p_a
@@ -125,6 +267,52 @@ def test_operators():
     assert p_h.si_units // 1E6 == p_h // 1
 
 
+def test_same_units_fast_path(monkeypatch):
+    p_a = Parameter(2, "mm")
+    p_b = Parameter(3, "mm")
+    assert p_a + p_b == Parameter(5, "mm")
+    assert (p_a + p_b).units == "mm"
+    assert (p_a * p_b).units == "mm^2"
+    assert (p_b - p_a).value == 1
+    assert (Parameter(1, "N.m") + Parameter(2, "m.N")).units == "N.m"
+
+    # Operands in the same units are not converted to SI units, the timing is
+    # compared in benchmarks/run_benchmarks.py
+    conversions = []
+    to_si = Parameter.to_si
+
+    def counted_to_si(self, out=None):
+        conversions.append(self)
+        return to_si(self, out)
+
+    monkeypatch.setattr(Parameter, "to_si", counted_to_si)
+    assert p_a + p_b == Parameter(5, "mm")
+    assert p_a * p_b == Parameter(6, "mm^2")
+    assert p_b - p_a == Parameter(1, "mm")
+    assert not conversions
+    p_c = Parameter(0.3, "cm")
+    assert p_a + p_c == Parameter(0.005, "m")
+    assert conversions == [p_a, p_c]
+
+
+def test_derived_units():
+    assert (Parameter(2, "N") * Parameter(3, "mm")).units == "N.m"
+    assert (Parameter(2, "mm") * Parameter(3, "m")).units == "m^2"
+    assert (Parameter(6, "m") / Parameter(3, "s")).units == "m/s"
+    assert (Parameter(2, "mm") ** 3).units == "mm^3"
+    assert 1 / Parameter(4, "s") == Parameter(0.25, "1/s")
+
+    # equivalent spellings of the same units are compatible
+    assert Parameter(1, "N.m") + Parameter(1, "m.N") == Parameter(2, "N.m")
+    assert Parameter(1, "psi") + Parameter(1, "Pa") == Parameter(6895.757293168361, "Pa")
+    assert Parameter(1, "kg/m^3") == Parameter(1e-9, "kg/mm^3")
+
+    with pytest.raises(ValueError):
+        Parameter(1, "m") + Parameter(1, "s")
+    with pytest.raises(ValueError):
+        Parameter(1, "m") ** Parameter(2, "m")
+
+
 def test_tables():
     parameters = Parameters(read_set_of_parameters_from_yaml("test/input_file.yaml")["test_parameters"])
     print("Original table:")
@@ -164,4 +352,82 @@ def test_conversion_to_dict(test_params):
 
     print(f"parameters.asdict: {parameters.asdict}")
 
-    print(f"test_params.asdict: {Parameters(**test_params).asdict}")
\ No newline at end of file
+    print(f"test_params.asdict: {Parameters(**test_params).asdict}")
+
+def test_list_values_to_arrays():
+    import numpy as np
+    from parameter.dtypes import dtype_policy
+
+    param = Parameter([[1, 2], [3, 4]], "mm")
+    assert isinstance(param.value, np.ndarray)
+    np.testing.assert_array_equal(param.si_units.value, [[0.001, 0.002], [0.003, 0.004]])
+    np.testing.assert_array_equal((param + Parameter(1, "m")).value, [[1.001, 1.002], [1.003, 1.004]])
+    assert param.si_units.export(preserve_container=True) == [[[0.001, 0.002], [0.003, 0.004]], "m"]
+    assert Parameter((1, 2), "m").export(preserve_container=True) == [(1, 2), "m"]
+    assert isinstance(Parameter([1, 2], "m").export()[0], np.ndarray)
+
+    # Non-numeric and ragged lists are kept as they are
+    assert Parameter(["a", "b"], "-").value == ["a", "b"]
+    assert Parameter([[1], [2, 3]], "-").value == [[1], [2, 3]]
+
+    with dtype_policy("float32"):
+        assert Parameter([1, 2], "m").value.dtype == np.float32
+
+
+def test_to_units(test_params):
+    moment = Parameter(3, "N.m").to("kN.mm")
+    assert moment.value == pytest.approx(3)
+    assert moment.units == "kN.mm"
+    with pytest.raises(ValueError):
+        Parameter(1, "m").to("s")
+
+    parameters = Parameters(**test_params)
+    converted = parameters.to({"a": "mm", "j": "N.mm"})
+    assert converted["a"].value == pytest.approx(1000)
+    assert converted["j"].value == pytest.approx(100)
+    assert converted["b"] is parameters["b"]
+    with pytest.raises(KeyError):
+        parameters.to({"missing": "m"})
+
+
+def test_compact_parameter():
+    import marshal
+    import yaml
+
+    a = Parameter(1, "".join(["m", "m"]))
+    b = Parameter(2, "mm")
+    assert not hasattr(a, "__dict__")
+    assert a.units is b.units
+    assert a.units == "mm" and str(a) == "1mm"
+    assert Parameter(1, "unknown").units == "unknown"
+    # Units stay plain strings, that any serializer accepts
+    assert type(a.units) is str and type(a.si_units.units) is str
+    assert type((Parameter(1, "m") * Parameter(2, "s")).units) is str
+    assert yaml.safe_dump({"units": a.si_units.units}) == "units: m\n"
+    assert marshal.loads(marshal.dumps(a.units)) == "mm"
+
+
+def test_dataclass_accessors():
+    from dataclasses import dataclass
+
+    @dataclass
+    class Base(Parameters):
+        a: Parameter
+        b__x: Parameter
+
+    @dataclass
+    class Extended(Base):
+        b__y: Parameter
+
+    a, x, y = Parameter([1, 2], "m"), Parameter(2, "mm"), Parameter(3, "mm")
+    base = Base(a=a, b__x=x)
+    extended = Extended(a=a, b__x=x, b__y=y)
+    assert base.items() == [("a", a), ("b__x", x)]
+    assert [key for key, _ in extended.items()] == ["a", "b__x", "b__y"]
+    assert extended["b__y"] is y
+
+    # asdict matches dataclasses.asdict, without copying the values
+    assert extended.asdict["a"]["value"] is a.value
+    assert extended.asdict["b__y"] == {"value": 3, "units": "mm"}
+    assert list(extended.group_by_prefix().b.value) == [2, 3]
+    assert Parameters(a=a).items() == [("a", a)]
@@ -0,0 +1,68 @@
+import random
+
+import pytest
+
+from parameter.parameter import Parameter, Parameters
+from parameter.persistent import ParametersSnapshot, PersistentMap
+
+
+class CollidingKey:
+    def __init__(self, name):
+        self.name = name
+
+    def __hash__(self):
+        return 42
+
+    def __eq__(self, other):
+        return isinstance(other, CollidingKey) and self.name == other.name
+
+
+def test_persistent_map_matches_dict():
+    rng = random.Random(0)
+    reference, persistent = {}, PersistentMap()
+    versions = []
+    for step in range(5000):
+        key = rng.randrange(2000)
+        if key in reference and rng.random() < 0.3:
+            del reference[key]
+            persistent = persistent.delete(key)
+        else:
+            reference[key] = step
+            persistent = persistent.set(key, step)
+        if step % 1000 == 0:
+            versions.append((dict(reference), persistent))
+    assert dict(persistent.items()) == reference
+    assert len(persistent) == len(reference)
+    # Earlier versions are unchanged
+    for expected, version in versions:
+        assert dict(version.items()) == expected
+    with pytest.raises(KeyError):
+        persistent.delete(-1)
+
+
+def test_hash_collisions():
+    keys = [CollidingKey(i) for i in range(4)]
+    persistent = PersistentMap((key, i) for i, key in enumerate(keys))
+    assert [persistent[key] for key in keys] == [0, 1, 2, 3]
+    persistent = persistent.delete(keys[1]).set("other", 9)
+    assert keys[1] not in persistent
+    assert persistent[keys[2]] == 2 and persistent["other"] == 9
+    assert len(persistent) == 4
+
+
+def test_parameters_snapshot():
+    parameters = Parameters(a=Parameter(1, "m"), b=Parameter(2, "mm"), c=Parameter(3, "s"))
+    shared = parameters.snapshot()
+    assert isinstance(shared, ParametersSnapshot)
+
+    override = Parameter(5, "mm")
+    derived = shared.update({"b": override}, d=Parameter(4, "kg"))
+    assert list(derived) == ["a", "b", "c", "d"]
+    assert derived["b"] is override
+    assert shared["b"] is parameters["b"]
+    assert derived["a"] is shared["a"]
+    assert list(derived.delete("a")) == ["b", "c", "d"]
+    assert shared.update({"a": parameters["a"]}) is shared
+
+    converted = derived.to_parameters().si_units
+    assert converted["b"].value == pytest.approx(0.005)
@@ -0,0 +1,111 @@
+from concurrent.futures import ProcessPoolExecutor
+from itertools import repeat
+import multiprocessing
+import pickle
+
+import numpy as np
+import pytest
+
+from parameter.parameter import Parameter, Parameters
+from parameter.shared import SharedParameters
+
+
+def summarise(shared, scale):
+    parameters = shared.parameters
+    values = parameters["values"].value
+    result = (
+        float(values.sum()) * scale,
+        values.dtype.str,
+        values.flags.writeable,
+        str(parameters["values"].units),
+        parameters["count"].value,
+    )
+    del parameters, values
+    shared.close()
+    return result
+
+
+@pytest.fixture
+def parameters():
+    return Parameters(
+        values=Parameter(np.arange(12, dtype=np.float32).reshape(3, 4), "mm"),
+        count=Parameter(3, "-"),
+        name=Parameter("study", "-"),
+        lengths=Parameter([1, 2, 3], "m"),
+        raw=5,
+    )
+
+
+def test_shared_parameters_round_trip(parameters):
+    with SharedParameters.publish(parameters) as shared:
+        attached = SharedParameters.attach(shared.name)
+        result = attached.parameters
+        values = result["values"].value
+        assert values.dtype == np.float32 and values.shape == (3, 4)
+        np.testing.assert_array_equal(values, parameters["values"].value)
+        assert not values.flags.writeable
+        with pytest.raises(ValueError):
+            values[0, 0] = 1
+        assert (result["name"].value, result["name"].units) == ("study", "-")
+        assert result["raw"] == 5
+        assert result["lengths"].export(preserve_container=True) == [[1, 2, 3], "m"]
+        # The array is a view of the shared memory
+        assert not values.flags.owndata
+
+        with pytest.raises(BufferError):
+            attached.close()
+        del result, values
+        attached.close()
+        assert attached.closed
+        with pytest.raises(ValueError):
+            attached.parameters
+
+    assert shared.closed
+    with pytest.raises(FileNotFoundError):
+        SharedParameters.attach(shared.name)
+
+
+def test_shared_parameters_unlinked_while_referenced(parameters):
+    with pytest.raises(KeyError):
+        with SharedParameters.publish(parameters) as shared:
+            values = shared.parameters["values"].value
+            raise KeyError("in flight")
+    # The block is unlinked even though an array is still referenced
+    with pytest.raises(FileNotFoundError):
+        SharedParameters.attach(shared.name)
+    assert not shared.closed
+    del values
+    shared.close()
+    assert shared.closed
+
+
+@pytest.mark.parametrize(
+    "method", [m for m in ("fork", "spawn") if m in multiprocessing.get_all_start_methods()]
+)
+def test_shared_parameters_process_pool(parameters, method):
+    context = multiprocessing.get_context(method)
+    with SharedParameters.publish(parameters) as shared:
+        # Only the name of the block is pickled
+        assert len(pickle.dumps(shared)) < 200
+        with ProcessPoolExecutor(2, mp_context=context) as pool:
+            results = list(pool.map(summarise, repeat(shared), [1, 2]))
+        # Workers leave the block in place for the publisher
+        SharedParameters.attach(shared.name).close()
+    assert results == [(66.0, "<f4", False, "mm", 3), (132.0, "<f4", False, "mm", 3)]
+
+
+def test_shared_parameters_groups():
+    parameters = Parameters(
+        a__x=Parameter(np.array([1.0, 2.0]), "m"),
+        a__y=Parameter(np.array([3.0, 4.0]), "m"),
+    ).group_by_prefix()
+    with SharedParameters.publish(parameters) as shared:
+        result = shared.parameters
+        assert result.groups == {"a"}
+        np.testing.assert_array_equal(result.a.value, parameters.a.value)
+        del result
+
+
+def test_shared_parameters_unsupported_value():
+    with pytest.raises(ValueError):
+        SharedParameters.publish(Parameters(a=Parameter(object(), "m")))
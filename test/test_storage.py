@@ -0,0 +1,98 @@
+from dataclasses import dataclass
+
+import numpy as np
+import pytest
+
+from parameter import mmap
+from parameter.mmap import ScaledArray
+from parameter.parameter import Parameter, Parameters
+from parameter.storage import load_parameters, save_parameters
+
+
+@pytest.fixture
+def parameters():
+    return Parameters(
+        stiffness=Parameter(np.arange(12, dtype=np.float32).reshape(3, 4), "N/mm"),
+        counts=Parameter(np.arange(6, dtype=">i2")[::2], "-"),
+        scale=Parameter(np.float32(0.5), "-"),
+        length=Parameter(150, "mm"),
+        name=Parameter("arm", "-"),
+        angles=Parameter([0, 120, 240], "deg"),
+        empty=Parameter(np.zeros((0, 3)), "m"),
+    )
+
+
+@pytest.mark.parametrize("mmap", [True, False])
+def test_save_and_load(tmp_path, parameters, mmap):
+    path = tmp_path / "parameters.params"
+    parameters.save(path)
+    loaded = Parameters.load(path, mmap=mmap)
+
+    assert list(loaded) == list(parameters)
+    for key, param in parameters.items():
+        value = loaded[key].value
+        assert str(loaded[key].units) == str(param.units)
+        if isinstance(param.value, (np.ndarray, np.generic)):
+            assert value.dtype == param.value.dtype
+            assert np.shape(value) == np.shape(param.value)
+            np.testing.assert_array_equal(value, param.value)
+        else:
+            assert value == param.value
+    assert loaded["angles"].export(preserve_container=True) == [[0, 120, 240], "deg"]
+    assert isinstance(loaded["stiffness"].value, np.memmap) is mmap
+    assert loaded["stiffness"].value.flags.writeable is not mmap
+
+
+def test_memory_mapped_values_convert_lazily(tmp_path, parameters, monkeypatch):
+    monkeypatch.setattr(mmap, "LAZY_SCALING_BYTES", 0)
+    path = tmp_path / "parameters.params"
+    save_parameters(parameters, path)
+    si = load_parameters(path)["stiffness"].si_units
+    assert isinstance(si.value, ScaledArray)
+    np.testing.assert_allclose(np.asarray(si.value), parameters["stiffness"].si_units.value)
+
+
+def test_loaded_si_units_are_ordinary_arrays(tmp_path, parameters):
+    path = tmp_path / "parameters.params"
+    parameters.save(path)
+    si = Parameters.load(path).si_units
+    stiffness = si["stiffness"].value
+    assert isinstance(stiffness, np.ndarray) and not isinstance(stiffness, ScaledArray)
+    assert stiffness.sum() == pytest.approx(66000)
+    assert stiffness.reshape(-1).tolist()[:2] == [0, 1000]
+    angles = si["angles"].export(preserve_container=True)[0]
+    assert isinstance(angles, list)
+    assert angles == pytest.approx(np.radians([0, 120, 240]).tolist())
+    assert "ScaledArray" not in si.table_pretty.get_string()
+
+
+def test_save_groups_and_dataclass(tmp_path):
+    @dataclass
+    class Arm(Parameters):
+        length: Parameter
+        radius: Parameter
+
+    arm = Arm(length=Parameter(np.array([1.0, 2.0]), "mm"), radius=Parameter(20, "mm"))
+    arm.save(tmp_path / "arm.params")
+    loaded = Arm.load(tmp_path / "arm.params")
+    assert isinstance(loaded, Arm)
+    np.testing.assert_array_equal(loaded.length.value, [1.0, 2.0])
+
+    grouped = Parameters(
+        a__x=Parameter(np.array([1.0, 2.0]), "m"), a__y=Parameter(np.array([3.0, 4.0]), "m")
+    ).group_by_prefix()
+    grouped.save(tmp_path / "grouped.params")
+    loaded = Parameters.load(tmp_path / "grouped.params")
+    assert loaded.groups == {"a"}
+    np.testing.assert_array_equal(loaded.a.value, grouped.a.value)
+
+
+def test_load_invalid_file(tmp_path):
+    path = tmp_path / "parameters.params"
+    path.write_bytes(b"not parameters at all")
+    with pytest.raises(ValueError):
+        load_parameters(path)
+    with pytest.raises(ValueError):
+        save_parameters(Parameters(a=Parameter(object(), "m")), path)
+    # A failed save leaves no file behind
+    assert [p.name for p in tmp_path.iterdir()] == ["parameters.params"]
@@ -0,0 +1,90 @@
+import pytest
+
+import parameter.conversion as convert
+from parameter.parameter import Parameter
+from parameter.units import (
+    conversion_factor,
+    clear_unit_cache,
+    compile_units,
+    divide_units,
+    get_SI_factor,
+    get_SI_units,
+    is_compatible,
+    multiply_units,
+    parse_units,
+    power_units,
+    unit_cache_info,
+)
+
+
+def test_compiled_units():
+    units = compile_units("mm/s")
+    assert units == "mm/s"
+    assert units.factor == 1e-3
+    assert units.si_units == "m/s"
+    assert get_SI_factor("kN.mm") == 1
+    assert get_SI_units("kN.mm") == "N.m"
+    assert get_SI_units("kg/mm^3") == "kg/m^3"
+    assert get_SI_units(1) == "1"
+
+    with pytest.raises(KeyError):
+        get_SI_units("m/furlong")
+
+
+def test_unit_dimensions():
+    assert parse_units("kg/m^3") == (("kg", 1), ("m", -3))
+    assert parse_units("m.s^-2") == (("m", 1), ("s", -2))
+    assert compile_units("N").dimensions == (1, 1, -2, 0, 0, 0, 0, 0)
+    assert compile_units("psi").dimensions == compile_units("Pa").dimensions
+    assert compile_units("kg/mm^3").factor == 1 / 1e-9
+    assert is_compatible("N.m", "m.N")
+    assert is_compatible("kN.mm", "lbf.ft")
+    assert not is_compatible("N.m", "N")
+
+    assert multiply_units("N", "mm") == "N.mm"
+    assert multiply_units("mm", "mm") == "mm^2"
+    assert divide_units("m", "s") == "m/s"
+    assert divide_units("m", "m") == "1"
+    assert divide_units("1", "s") == "1/s"
+    assert power_units("m/s", 2) == "m^2/s^2"
+    assert power_units("m^2", 0.5) == "m"
+
+    with pytest.raises(ValueError):
+        parse_units("m^")
+    with pytest.raises(ValueError):
+        power_units("m", 0.5)
+
+
+def test_unit_cache_stats():
+    clear_unit_cache()
+    compile_units("N.mm")
+    compile_units("N.mm")
+    Parameter(3, "N.mm").si_units
+    info = unit_cache_info()
+    assert info.misses == 1
+    assert info.hits == 2
+    assert info.currsize == 1
+
+
+def test_unit_cache_invalidated_by_conversion_table():
+    assert compile_units("mm").si_units == "m"
+    try:
+        convert.TO_SI_FACTOR["furlong"] = 201.168
+        convert.TO_SI_UNITS["furlong"] = "m"
+        assert Parameter(1, "furlong/s").si_units.value == 201.168
+
+        convert.TO_SI_FACTOR["furlong"] = 201
+        assert Parameter(1, "furlong/s").si_units.value == 201
+    finally:
+        del convert.TO_SI_FACTOR["furlong"]
+        del convert.TO_SI_UNITS["furlong"]
+
+    with pytest.raises(KeyError):
+        compile_units("furlong")
+
+
+def test_conversion_factor():
+    assert conversion_factor("kN.mm", "N.m") == pytest.approx(1)
+    assert conversion_factor("m/s", "mm/min") == pytest.approx(60000)
+    with pytest.raises(ValueError):
+        conversion_factor("m", "s")